@@ -25,6 +25,8 @@ export const useChat = (options: UseChatOptions = {}) => {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   // const [sessionId, setSessionId] = useState<string | null>(options.sessionId || null);  // Commented out
+  // Backend conversation id, assigned by the first /chat response
+  const chatSessionRef = useRef<string | undefined>(undefined);
 
   const { enableTTS = false, enableAvatar = false, onAvatarResponse, onAvatarGenerationStart /* userId */ } = options;
 
@@ -53,14 +55,15 @@ export const useChat = (options: UseChatOptions = {}) => {
       const response = await therapyApi.chat(
         content,
         currentEmotion || 'neutral',
-        // sessionId || undefined  // Commented out session functionality
-        undefined
+        chatSessionRef.current
       );
 
       if (response.status !== 'success') {
         throw new Error('Failed to get therapy response');
       }
 
+      chatSessionRef.current = response.session_id;
+
       // Create therapist message
       const therapistMessage: ChatMessage = {
         id: `therapist_${Date.now()}`,
@@ -86,13 +89,28 @@ export const useChat = (options: UseChatOptions = {}) => {
 
       // Generate avatar if enabled
       if (enableAvatar) {
-        // Skip API call and directly use the dummy video
         onAvatarGenerationStart?.();
-        
-        // Directly use the dummy video file from public folder
-        therapistMessage.avatarUrl = '/aiVideo.mp4';
-        
-        console.log('Avatar enabled: Using dummy video /aiVideo.mp4');
+
+        try {
+          // Rendering runs as a backend job; wait for it to finish (failed jobs carry the fallback video)
+          const job = await therapyApi.generateAvatar(response.response);
+          const finished = job.state === 'done' || job.state === 'failed'
+            ? job
+            : await therapyApi.waitForAvatar(job.job_id);
+          if (finished.video_url) {
+            // Prepend backend URL to locally served videos
+            therapistMessage.avatarUrl = finished.video_url.startsWith('/')
+              ? `${API_CONFIG.AI_BACKEND_URL}${finished.video_url}`
+              : finished.video_url;
+          }
+        } catch (avatarError) {
+          console.warn('Avatar generation failed:', avatarError);
+        }
+
+        if (!therapistMessage.avatarUrl) {
+          // Backend unreachable: use the dummy video from the public folder
+          therapistMessage.avatarUrl = '/aiVideo.mp4';
+        }
       }
 
       setMessages(prev => [...prev, therapistMessage]);
@@ -129,6 +147,7 @@ export const useChat = (options: UseChatOptions = {}) => {
   const clearMessages = useCallback(() => {
     setMessages([]);
     setError(null);
+    chatSessionRef.current = undefined;
   }, []);
 
   const getLastUserEmotion = useCallback((): string | undefined => {
@@ -52,13 +52,38 @@ export const mlApi = new ApiClient(API_CONFIG.ML_BACKEND_URL);
 
 // Emotion detection API
 export const emotionApi = {
-  detectEmotion: async (imageData: string) => {
+  detectEmotion: async (imageData: string, sessionId?: string) => {
     return mlApi.post<{
       emotion: string;
       confidence: number;
       emotions: Record<string, number>;
       status: string;
-    }>('/detect-emotion', { image: imageData });
+    }>('/detect-emotion', { image: imageData, session_id: sessionId });
+  },
+
+  // Send an encoded frame (e.g. canvas.toBlob JPEG) without base64/JSON wrapping
+  detectEmotionRaw: async (frame: Blob, sessionId?: string) => {
+    const response = await fetch(`${API_CONFIG.ML_BACKEND_URL}/detect_emotion_raw`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': frame.type || 'image/jpeg',
+        ...(sessionId ? { 'X-Session-Id': sessionId } : {}),
+      },
+      body: frame,
+    });
+
+    if (!response.ok) {
+      throw new Error(`API Error: ${response.status} - ${response.statusText}`);
+    }
+
+    return response.json() as Promise<{
+      emotion: string;
+      confidence: number;
+      emotions: Record<string, number>;
+      timestamp: string;
+      face_detected: boolean;
+      frame_skipped: boolean;
+    }>;
   },
 
   analyzeVideo: async (videoData: Blob) => {
@@ -72,14 +97,126 @@ export const emotionApi = {
   },
 };
 
+// Payload of the Server-Sent Events emitted by the streaming chat endpoints
+interface StreamEventData {
+  session_id?: string;
+  token?: string;
+  index?: number;
+  text?: string;
+  audio_url?: string | null;
+  response?: string;
+  audio_urls?: (string | null)[];
+  video_url?: string;
+  detail?: string;
+}
+
+// Read a Server-Sent Events response from the AI backend, calling onEvent for each event
+async function readEventStream(
+  endpoint: string,
+  body: unknown,
+  onEvent: (event: string, data: StreamEventData) => void
+) {
+  const response = await fetch(`${API_CONFIG.AI_BACKEND_URL}${endpoint}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = raw.match(/^event: (.*)$/m)?.[1] ?? 'message';
+      const data: StreamEventData = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] ?? '{}');
+      if (event === 'error') throw new Error(data.detail);
+      onEvent(event, data);
+    }
+  }
+}
+
+interface AvatarJob {
+  job_id: string;
+  state: 'queued' | 'rendering' | 'done' | 'failed';
+  video_url: string | null;
+  error: string | null;
+  status: string;
+}
+
 // AI therapy API
 export const therapyApi = {
   chat: async (message: string, emotion: string, sessionId?: string) => {
-    // Note: sessionId parameter is kept for compatibility but not used
+    // Omit sessionId to start a new conversation; reuse the returned session_id to continue it
     return aiApi.post<{
       response: string;
+      session_id: string;
       status: string;
-    }>('/chat', { message, emotion /* session_id: sessionId */ });
+    }>('/chat', { message, emotion, session_id: sessionId });
+  },
+
+  chatStream: async (
+    message: string,
+    emotion: string,
+    onToken: (token: string) => void,
+    sessionId?: string
+  ) => {
+    // Same as chat, but tokens are delivered through onToken as they are generated
+    const result = { response: '', session_id: sessionId ?? '', status: 'success' };
+    await readEventStream('/chat/stream', { message, emotion, session_id: sessionId }, (event, data) => {
+      if (event === 'session') result.session_id = data.session_id ?? result.session_id;
+      else if (event === 'token') onToken(data.token ?? '');
+      else if (event === 'done') result.response = data.response ?? '';
+    });
+    return result;
+  },
+
+  chatSpeak: async (
+    message: string,
+    emotion: string,
+    handlers: {
+      onToken?: (token: string) => void;
+      onAudio?: (audioUrl: string, index: number, text: string) => void;
+    },
+    options: { sessionId?: string; voice?: string; avatar?: boolean; avatarId?: string } = {}
+  ) => {
+    // Chat reply with speech synthesized per sentence; audio URLs arrive in order while the reply streams
+    const result = {
+      response: '',
+      session_id: options.sessionId ?? '',
+      audio_urls: [] as (string | null)[],
+      video_url: undefined as string | undefined,
+      status: 'success',
+    };
+    await readEventStream('/chat/speak', {
+      message,
+      emotion,
+      session_id: options.sessionId,
+      voice: options.voice ?? 'default',
+      avatar: options.avatar ?? false,
+      avatar_id: options.avatarId ?? 'default',
+    }, (event, data) => {
+      if (event === 'session') result.session_id = data.session_id ?? result.session_id;
+      else if (event === 'token') handlers.onToken?.(data.token ?? '');
+      else if (event === 'audio' && data.audio_url) handlers.onAudio?.(data.audio_url, data.index ?? 0, data.text ?? '');
+      else if (event === 'done') {
+        result.response = data.response ?? '';
+        result.audio_urls = data.audio_urls ?? [];
+        result.video_url = data.video_url;
+      }
+    });
+    return result;
   },
 
   generateSpeech: async (text: string, voice: string = 'default') => {
@@ -89,11 +226,23 @@ export const therapyApi = {
     }>('/tts', { text, voice });
   },
 
+  // URL for an <audio> element: playback starts on the first chunk instead of after synthesis finishes
+  speechStreamUrl: (text: string, voice: string = 'default') => {
+    const params = new URLSearchParams({ text, voice });
+    return `${API_CONFIG.AI_BACKEND_URL}/tts/stream?${params}`;
+  },
+
+  // Starts a render job; video_url is set once the job is done (or failed, with the fallback video)
   generateAvatar: async (text: string, avatarId: string = 'default') => {
-    return aiApi.post<{
-      video_url: string;
-      status: string;
-    }>('/avatar', { text, avatar_id: avatarId });
+    return aiApi.post<AvatarJob>('/avatar', { text, avatar_id: avatarId });
+  },
+
+  // Long-poll an avatar job until it finishes
+  waitForAvatar: async (jobId: string) => {
+    while (true) {
+      const job = await aiApi.get<AvatarJob>(`/avatar/jobs/${jobId}?wait=25`);
+      if (job.state === 'done' || job.state === 'failed') return job;
+    }
   },
 
   // Session endpoints commented out for now
@@ -1,13 +1,17 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 import os
+import json
+import uuid
 import multiprocessing
 import sys
 from dotenv import load_dotenv
 
+from services.media_files import MediaFiles
+
 # Fix for Windows multiprocessing issues
 if sys.platform == "win32":
     multiprocessing.set_start_method("spawn", force=True)
@@ -35,15 +39,17 @@ security = HTTPBearer()
 # Create temp directory for audio files
 os.makedirs("temp", exist_ok=True)
 
-# Mount static files for audio and video serving
-app.mount("/audio", StaticFiles(directory="temp"), name="audio")
-app.mount("/video", StaticFiles(directory="temp"), name="video")
+# Mount static files for audio and video serving (ETags, cache headers and range requests)
+app.mount("/audio", MediaFiles(directory="temp"), name="audio")
+app.mount("/video", MediaFiles(directory="temp"), name="video")
 
 # Initialize services lazily to avoid import issues
 gemini_service = None
 groq_service = None
 tts_service = None
 avatar_service = None
+avatar_jobs = None
+db_service = None
 
 def get_services():
     """Lazy initialization of services"""
@@ -58,18 +64,60 @@ def get_services():
     #     avatar_service = AvatarService()
     
     # return gemini_service, tts_service, avatar_service
-    global groq_service, tts_service, avatar_service
+    global groq_service, tts_service, avatar_service, avatar_jobs
     if groq_service is None:
         from services.ai_service import GroqService
         from services.tts_service import TTSService
         from services.avatar_service import AvatarService
+        from services.avatar_jobs import AvatarJobManager
 
         groq_service = GroqService()
         tts_service = TTSService()
         avatar_service = AvatarService()
+        avatar_jobs = AvatarJobManager(
+            avatar_service,
+            webhook_url=os.getenv("DID_WEBHOOK_URL"),
+            cache_size=int(os.getenv("AVATAR_CACHE_SIZE", "256")),
+            cache_ttl=float(os.getenv("AVATAR_CACHE_TTL", str(12 * 3600))),
+        )
 
     return groq_service, tts_service, avatar_service
 
+@app.on_event("startup")
+async def startup():
+    """Create services (and the pooled LLM/HTTP clients) before the first request"""
+    from services.http_clients import open_http_clients
+    from services.temp_janitor import get_temp_janitor
+    open_http_clients()
+    # Stale partial files in temp/ are removed in the background, off the request path
+    get_temp_janitor().start()
+    await connect_database()
+    try:
+        get_services()
+    except Exception as e:
+        # Keep serving health checks; /chat will retry initialization
+        print(f"⚠️ Service initialization failed: {str(e)}")
+
+async def connect_database():
+    """Create the app-wide pooled MongoDB client (when MONGODB_URL is set and motor is installed)"""
+    global db_service
+    if not os.getenv("MONGODB_URL"):
+        return
+    try:
+        from services.database_service import DatabaseService
+    except ImportError as e:
+        print(f"⚠️ MongoDB disabled: {str(e)}")
+        return
+    db_service = DatabaseService()
+    # No ping here: the driver's heartbeats report reachability without delaying startup
+    await db_service.connect(verify=False)
+
+def get_db_service():
+    """Dependency: the shared DatabaseService"""
+    if db_service is None:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    return db_service
+
 @app.get("/") # this is known as a decorator and gets executed when the root endpoint is hit
 async def root():
     return {"message": "AI Therapist Backend API", "status": "running"}
@@ -78,6 +126,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "ai-backend"}
 
+@app.get("/health/db")
+async def database_health(db=Depends(get_db_service)):
+    """MongoDB reachability and pool settings"""
+    return db.health()
+
 @app.post("/chat") # This is also a decorator and gets executed when the /chat endpoint is hit and post is the method that is used to send data to the endpoint
 async def chat_with_therapist(message: dict):
     """Generate therapeutic response using Groq"""
@@ -86,13 +139,101 @@ async def chat_with_therapist(message: dict):
         
         user_message = message.get("message", "")
         emotion = message.get("emotion", "neutral")
-        # session_id = message.get("session_id", None)  # Commented out session functionality
+        # Each chat continues its own history; new chats get a fresh session id
+        session_id = message.get("session_id") or str(uuid.uuid4())
+
+        response = await groq_service.generate_therapy_response(user_message, emotion, session_id)
+        return {"response": response, "session_id": session_id, "status": "success"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_with_therapist_stream(message: dict):
+    """Stream the therapeutic response as Server-Sent Events"""
+    try:
+        groq_service, _, _ = get_services()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    user_message = message.get("message", "")
+    emotion = message.get("emotion", "neutral")
+    session_id = message.get("session_id") or str(uuid.uuid4())
+
+    async def events():
+        # session first so the client can continue the conversation even if the stream breaks
+        yield sse_event("session", {"session_id": session_id})
+        parts = []
+        tokens = groq_service.stream_therapy_response(user_message, emotion, session_id)
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"❌ Groq Error: {str(e)}"})
+            return
+        finally:
+            # Client went away: stop the upstream stream now, not when collected
+            await tokens.aclose()
+        yield sse_event("done", {"response": "".join(parts).strip(), "session_id": session_id})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        response = await groq_service.generate_therapy_response(user_message, emotion)
-        return {"response": response, "status": "success"}
+@app.post("/chat/speak")
+async def chat_speak(message: dict):
+    """Stream the therapeutic response with per-sentence speech (and optionally an avatar video) as Server-Sent Events"""
+    try:
+        groq_service, tts_service, avatar_service = get_services()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    from services.speech_pipeline import SpeechPipeline
+
+    user_message = message.get("message", "")
+    emotion = message.get("emotion", "neutral")
+    session_id = message.get("session_id") or str(uuid.uuid4())
+    voice = message.get("voice", "default")
+    avatar = message.get("avatar", False)
+    avatar_id = message.get("avatar_id", "default")
+
+    async def speak(sentence: str) -> str:
+        return await tts_service.generate_speech(sentence, voice)
+
+    async def create_avatar(response: str) -> dict:
+        job = await avatar_jobs.wait(avatar_jobs.submit(response, avatar_id).job_id)
+        return {"video_url": job.video_url}
+
+    pipeline = SpeechPipeline(speak, max_concurrency=int(os.getenv("TTS_PIPELINE_CONCURRENCY", "3")))
+
+    async def events():
+        yield sse_event("session", {"session_id": session_id})
+        tokens = groq_service.stream_therapy_response(user_message, emotion, session_id)
+        pipeline_events = pipeline.run(tokens, finalize=create_avatar if avatar else None)
+        try:
+            async for event in pipeline_events:
+                name = event.pop("event")
+                if name == "error":
+                    event["detail"] = f"❌ Groq Error: {event['detail']}"
+                elif name == "done":
+                    event["session_id"] = session_id
+                yield sse_event(name, event)
+        finally:
+            # Client went away: cancel synthesis and close the token stream
+            await pipeline_events.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/tts")
 async def text_to_speech(text_data: dict):
     """Convert text to speech"""
@@ -107,38 +248,129 @@ async def text_to_speech(text_data: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/tts/stream")
+async def text_to_speech_stream(text: str, voice: str = "default"):
+    """Stream speech as chunked audio (usable directly as an <audio> src)"""
+    try:
+        _, tts_service, _ = get_services()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # audio/mpeg, or audio/wav when the fallback tone is served
+    chunks, media_type = await tts_service.open_speech_stream(text, voice)
+    return StreamingResponse(chunks, media_type=media_type)
+
+@app.get("/stats/tts_cache")
+async def tts_cache_stats():
+    """Hit rate and disk usage of the TTS audio cache"""
+    _, tts_service, _ = get_services()
+    return tts_service.cache.stats()
+
+@app.get("/stats/temp")
+async def temp_stats():
+    """Stale partial files the janitor has removed from temp/"""
+    from services.temp_janitor import get_temp_janitor
+    return get_temp_janitor().stats()
+
 @app.post("/avatar")
 async def generate_avatar(avatar_data: dict):
-    """Generate talking avatar video"""
+    """Start rendering a talking avatar video; returns a job to follow via /avatar/jobs/{job_id}"""
     try:
-        _, _, avatar_service = get_services()
+        get_services()
         
         text = avatar_data.get("text", "")
         avatar_id = avatar_data.get("avatar_id", "default")
         
-        video_url = await avatar_service.create_talking_avatar(text, avatar_id)
-        return {"video_url": video_url, "status": "success"}
+        job = avatar_jobs.submit(text, avatar_id)
+        return {**job.to_dict(), "status": "success"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# @app.post("/session")
-# async def create_session(session_data: dict):
-#     """Create new therapy session"""
-#     try:
-#         user_id = session_data.get("user_id")
-#         session_id = await db_service.create_session(user_id)
-#         return {"session_id": session_id, "status": "success"}
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=str(e))
-
-# @app.get("/session/{session_id}")
-# async def get_session(session_id: str):
-#     """Get session data"""
-#     try:
-#         session = await db_service.get_session(session_id)
-#         return {"session": session, "status": "success"}
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=str(e))
+def get_avatar_job(job_id: str):
+    job = avatar_jobs.get(job_id) if avatar_jobs else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown avatar job")
+    return job
+
+@app.get("/avatar/jobs/{job_id}")
+async def avatar_job_status(job_id: str, wait: float = 0):
+    """Avatar job state; with ?wait=N, long-polls up to N seconds (max 30) for it to finish"""
+    job = get_avatar_job(job_id)
+    if wait > 0:
+        await avatar_jobs.wait(job_id, min(wait, 30.0))
+    return {**job.to_dict(), "status": "success"}
+
+@app.get("/avatar/jobs/{job_id}/events")
+async def avatar_job_events(job_id: str):
+    """Avatar job state as Server-Sent Events: the current state, then `done` when it finishes"""
+    job = get_avatar_job(job_id)
+
+    async def events():
+        yield sse_event("state", job.to_dict())
+        while not job.done.is_set():
+            await avatar_jobs.wait(job_id, 15.0)
+            if not job.done.is_set():
+                # Keep proxies from closing an idle stream
+                yield ": keepalive\n\n"
+        yield sse_event("done", job.to_dict())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/avatar/webhook")
+async def avatar_webhook(talk: dict, token: str = ""):
+    """D-ID render completion callback (set DID_WEBHOOK_URL to this endpoint's public URL)"""
+    expected = os.getenv("DID_WEBHOOK_TOKEN")
+    if expected and token != expected:
+        raise HTTPException(status_code=403, detail="Invalid webhook token")
+    matched = avatar_jobs.complete_talk(talk) if avatar_jobs else False
+    return {"matched": matched, "status": "success"}
+
+@app.get("/stats/avatar_jobs")
+async def avatar_job_stats():
+    """Outstanding and finished avatar jobs and D-ID status checks made"""
+    get_services()
+    return avatar_jobs.stats()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Persist active conversations and release pooled clients"""
+    if groq_service is not None:
+        await groq_service.context.close()
+        groq_service.conversations.flush()
+
+    from services.llm_client import close_llm_client
+    from services.http_clients import close_http_clients
+    from services.temp_janitor import get_temp_janitor
+    await close_llm_client()
+    await close_http_clients()
+    await get_temp_janitor().stop()
+    if avatar_jobs is not None:
+        await avatar_jobs.stop()
+    if db_service is not None:
+        await db_service.disconnect()
+
+@app.post("/session")
+async def create_session(session_data: dict, db=Depends(get_db_service)):
+    """Create new therapy session"""
+    try:
+        user_id = session_data.get("user_id")
+        session_id = await db.create_session(user_id)
+        return {"session_id": session_id, "status": "success"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/session/{session_id}")
+async def get_session(session_id: str, db=Depends(get_db_service)):
+    """Get session data"""
+    try:
+        session = await db.get_session(session_id)
+        return {"session": session, "status": "success"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     # Add multiprocessing support for Windows
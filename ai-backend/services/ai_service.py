@@ -1,8 +1,10 @@
 import os
-import asyncio
 import logging
 from dotenv import load_dotenv
-from groq import Groq
+
+from services.context_manager import ContextWindowManager
+from services.conversation_store import ConversationStore
+from services.llm_client import get_llm_client
 
 # Load .env variables
 load_dotenv()
@@ -12,9 +14,6 @@ api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
     raise ValueError("❌ GROQ_API_KEY is not set in environment variables!")
 
-# Initialize Groq client
-client = Groq(api_key=api_key)
-
 # System prompt (same as your Groq version)
 SYSTEM_PROMPT = """
 You are a supportive, non-clinical mental health assistant for college students. 
@@ -35,105 +34,131 @@ Your goals:
 - Keep responses natural, warm, and 3–6 sentences long.
 """
 
-# Conversation history to maintain context
-conversation_history = [
-    {"role": "system", "content": SYSTEM_PROMPT}
-]
-
-# Main function to use in UI (same interface as before)
-def get_bot_reply(user_message: str) -> str:
-    """
-    Takes a user message, sends it to Groq, returns the reply.
-    Preserves conversation history within the session.
-    """
-    global conversation_history
-    
-    try:
-        # Add user message to history
-        conversation_history.append({"role": "user", "content": user_message})
-        
-        # Call Groq API with full history
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=conversation_history,
-            max_tokens=300,
-            temperature=0.7
-        )
-        
-        bot_message = response.choices[0].message.content
-        
-        # Add bot reply to history
-        conversation_history.append({"role": "assistant", "content": bot_message})
-        
-        return bot_message.strip()
-    except Exception as e:
-        return f"❌ Groq Error: {str(e)}"
-
 class GroqService:
     """
     Groq-powered AI service for therapy responses
     """
     
     def __init__(self):
-        self.conversation_history = [
-            {"role": "system", "content": SYSTEM_PROMPT}
-        ]
+        # Per-session histories (system prompt is prepended on each call, not stored)
+        self.conversations = ConversationStore(
+            max_active_sessions=int(os.getenv("MAX_ACTIVE_SESSIONS", "1000")),
+            max_messages=2 * int(os.getenv("MAX_HISTORY_TURNS", "6")),
+            storage_dir=os.getenv("CONVERSATION_STORE_DIR", "sessions"),
+            retention=float(os.getenv("CONVERSATION_RETENTION_HOURS", "168")) * 3600,
+        )
+        # Older turns are folded into a running summary off the request path
+        self.context = ContextWindowManager(
+            summarize=self._summarize,
+            max_prompt_tokens=int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000")),
+        )
+        self.model_name = "llama-3.1-8b-instant"
+        # Shared async client with a pooled keep-alive connection set
+        self.client = get_llm_client()
+
+    async def _summarize(self, messages: list) -> str:
+        """Summarize older turns (used by the context manager in the background)"""
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            max_tokens=250,
+            temperature=0.3
+        )
+        return response.choices[0].message.content
 
     async def test_connection(self):
         """Test Groq API connection"""
         try:
             # Simple test prompt
-            response = await self.generate_therapy_response("Hello, this is a test.")
+            response = await self.generate_therapy_response("Hello, this is a test.", session_id="connection-test")
+            self.conversations.reset("connection-test")
             print(f"✅ Groq API connection successful with model: {self.model_name}")
             return True
         except Exception as e:
             print(f"❌ Groq connection test failed: {str(e)}")
             return False
     
-    async def generate_therapy_response(self, user_message: str, emotion: str = "neutral") -> str:
+    async def generate_therapy_response(self, user_message: str, emotion: str = "neutral", session_id: str = "default") -> str:
         """
         Generate therapeutic response using Groq API
         
         Args:
             user_message: The user's message
             emotion: Detected emotion (currently not used but kept for compatibility)
+            session_id: Conversation to continue; each session has its own history
             
         Returns:
             AI-generated therapeutic response
         """
-        try:
-            # Add user message to history
-            self.conversation_history.append({"role": "user", "content": user_message})
-            
-            # Call Groq API with full history
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(None, lambda: client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=self.conversation_history,
-                max_tokens=300,
-                temperature=0.7
-            ))
-            
-            bot_message = response.choices[0].message.content
-            
-            # Add bot reply to history
-            self.conversation_history.append({"role": "assistant", "content": bot_message})
-            
-            return bot_message.strip()
-        except Exception as e:
-            return f"❌ Groq Error: {str(e)}"
+        conversation = self.conversations.get(session_id)
+        async with conversation.lock:
+            try:
+                # System prompt + running summary + recent turns, within the token budget
+                messages = self.context.build_messages(SYSTEM_PROMPT, conversation, user_message)
+                
+                # Call Groq API with this session's history
+                response = await self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=messages,
+                    max_tokens=300,
+                    temperature=0.7
+                )
+                
+                bot_message = response.choices[0].message.content
+                
+                # Record the exchange only once it succeeded
+                conversation.append("user", user_message)
+                conversation.append("assistant", bot_message)
+                self.context.schedule_summary(conversation)
+                
+                return bot_message.strip()
+            except Exception as e:
+                return f"❌ Groq Error: {str(e)}"
 
-# Optional: test from terminal
-if __name__ == "__main__":
-    print("Groq Health-Bot is running. Type 'exit' to quit.\n")
-    while True:
-        user_input = input("You: ")
-        if user_input.lower() in ["exit", "quit", "bye"]:
-            print("Bot: Take care! Ending the session now.")
-            break
-        reply = get_bot_reply(user_input)
-        print("Bot:", reply)
+    async def stream_therapy_response(self, user_message: str, emotion: str = "neutral", session_id: str = "default"):
+        """
+        Stream a therapeutic response token by token
 
+        Same prompt and history handling as generate_therapy_response; the
+        assembled reply is recorded once the stream completes. The session
+        lock is only held to read the context and to record the reply, so a
+        client that disconnects mid-stream never blocks its session.
+
+        Yields:
+            Text deltas as they arrive from the Groq API
+        """
+        conversation = self.conversations.get(session_id)
+        async with conversation.lock:
+            messages = self.context.build_messages(SYSTEM_PROMPT, conversation, user_message)
+
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            max_tokens=300,
+            temperature=0.7,
+            stream=True
+        )
+
+        parts = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        finally:
+            # Abandoned streams release their upstream connection right away
+            await stream.close()
+
+        # Record the exchange only once the full reply has streamed; the
+        # session may have been evicted and reloaded in the meantime
+        conversation = self.conversations.get(session_id)
+        async with conversation.lock:
+            conversation.append("user", user_message)
+            conversation.append("assistant", "".join(parts))
+            self.context.schedule_summary(conversation)
 
 # Terminal Chat Interface for Groq
 async def main():
@@ -221,6 +246,6 @@ async def main():
             print(f"\n❌ Error: {str(e)}")
             print("Please try again or type 'quit' to exit.")
 
-# if __name__ == "__main__":
-#     import asyncio
-#     asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(main())
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class AvatarJob:
+    """
+    One avatar render, from submission to a playable video URL.
+
+    state: queued -> rendering -> done | failed (failed jobs still carry the
+    fallback video so the client always has something to play).
+    """
+
+    def __init__(self, text: str, avatar_id: str = "default", key: Optional[str] = None):
+        self.job_id = str(uuid.uuid4())
+        self.text = text
+        self.avatar_id = avatar_id
+        self.key = key
+        self.state = "queued"
+        self.video_url: Optional[str] = None
+        self.error: Optional[str] = None
+        self.talk_id: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.interval = 0.0
+        self.next_check = 0.0
+        self.done = asyncio.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "video_url": self.video_url,
+            "error": self.error,
+        }
+
+class AvatarJobManager:
+    """
+    Run avatar renders as jobs instead of holding the request open
+
+    `submit()` returns immediately. A single background poller checks every
+    outstanding D-ID talk whose next check is due (concurrently, over the
+    pooled client), backing off from `initial_interval` to `max_interval`
+    per talk. With a webhook configured, D-ID's callback completes the job
+    without waiting for the next poll. Finished jobs are kept for `job_ttl`
+    seconds so clients can collect them.
+
+    Identical requests (same text and presenter) share work: while one is
+    rendering, later submissions get the same job, and finished result URLs
+    are remembered for `cache_ttl` seconds (D-ID result links expire).
+    """
+
+    def __init__(
+        self,
+        avatar_service,
+        webhook_url: Optional[str] = None,
+        initial_interval: float = 1.0,
+        max_interval: float = 8.0,
+        backoff: float = 1.5,
+        timeout: float = 120,
+        job_ttl: float = 600,
+        cache_size: int = 256,
+        cache_ttl: float = 12 * 3600,
+    ):
+        self.avatar_service = avatar_service
+        self.webhook_url = webhook_url
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
+        self.jobs: Dict[str, AvatarJob] = {}
+        self.rendering: Dict[str, AvatarJob] = {}  # D-ID talk id -> job
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.starting: Set[asyncio.Task] = set()
+        self.inflight: Dict[str, AvatarJob] = {}  # render key -> unfinished job
+        self.renders: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # render key -> (video URL, rendered at)
+        self.status_checks = 0
+        self.cache_hits = 0
+        self.deduplicated = 0
+
+    def render_key(self, text: str, avatar_id: str = "default") -> str:
+        payload = json.dumps({"text": text, "presenter": self.avatar_service.presenter_id(avatar_id)}, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, text: str, avatar_id: str = "default") -> AvatarJob:
+        self.start()
+        key = self.render_key(text, avatar_id)
+
+        job = self.inflight.get(key)
+        if job is not None:
+            # Single flight: wait on the render that is already running
+            self.deduplicated += 1
+            return job
+
+        job = AvatarJob(text, avatar_id, key)
+        self.jobs[job.job_id] = job
+        video_url = self._cached_render(key)
+        if video_url is not None:
+            self.cache_hits += 1
+            self._finish(job, video_url)
+            return job
+
+        self.inflight[key] = job
+        task = asyncio.create_task(self._start(job))
+        self.starting.add(task)
+        task.add_done_callback(self.starting.discard)
+        return job
+
+    def _cached_render(self, key: str) -> Optional[str]:
+        entry = self.renders.get(key)
+        if entry is None:
+            return None
+        video_url, rendered = entry
+        if time.time() - rendered > self.cache_ttl:
+            del self.renders[key]
+            return None
+        self.renders.move_to_end(key)
+        return video_url
+
+    def get(self, job_id: str) -> Optional[AvatarJob]:
+        return self.jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[AvatarJob]:
+        """Wait up to `timeout` seconds for a job to finish; returns it in whatever state it is in"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def _start(self, job: AvatarJob):
+        if not self.avatar_service.did_api_key:
+            # Development mode: the service answers with the dummy video right away
+            self._finish(job, await self.avatar_service.create_talking_avatar(job.text, job.avatar_id))
+            return
+        try:
+            job.talk_id = await self.avatar_service.start_talk(job.text, job.avatar_id, self.webhook_url)
+        except Exception as e:
+            self._fail(job, str(e))
+            return
+        job.state = "rendering"
+        job.interval = self.initial_interval
+        job.next_check = time.time() + job.interval
+        self.rendering[job.talk_id] = job
+        self.wakeup.set()
+
+    def _finish(self, job: AvatarJob, video_url: str):
+        job.state = "done"
+        job.video_url = video_url
+        if job.talk_id and video_url:
+            # Only real renders are worth remembering; the dummy video is instant anyway
+            self.renders[job.key] = (video_url, time.time())
+            self.renders.move_to_end(job.key)
+            while len(self.renders) > self.cache_size:
+                self.renders.popitem(last=False)
+        self._close(job)
+
+    def _fail(self, job: AvatarJob, error: str):
+        logger.error(f"❌ Avatar job {job.job_id} failed: {error}")
+        job.state = "failed"
+        job.error = error
+        # Same fallback as the synchronous path
+        job.video_url = self.avatar_service._create_dummy_video()
+        self._close(job)
+
+    def _close(self, job: AvatarJob):
+        job.finished = time.time()
+        if job.talk_id:
+            self.rendering.pop(job.talk_id, None)
+        if self.inflight.get(job.key) is job:
+            del self.inflight[job.key]
+        job.done.set()
+
+    def _apply(self, job: AvatarJob, talk: Dict) -> bool:
+        """Update a job from a D-ID talk payload; True once it is finished"""
+        if job.done.is_set():
+            # Already completed (e.g. by the webhook while a poll was in flight)
+            return True
+        status = talk.get("status")
+        if status == "done":
+            self._finish(job, talk.get("result_url"))
+            return True
+        if status == "error":
+            self._fail(job, f"Video generation failed: {talk.get('error', {}).get('description')}")
+            return True
+        return False
+
+    def complete_talk(self, talk: Dict) -> bool:
+        """Handle a D-ID webhook callback; False if the talk isn't one of ours"""
+        job = self.rendering.get(talk.get("id"))
+        if job is None:
+            return False
+        self._apply(job, talk)
+        return True
+
+    async def _check(self, job: AvatarJob):
+        self.status_checks += 1
+        try:
+            if self._apply(job, await self.avatar_service.get_talk(job.talk_id)):
+                return
+        except Exception as e:
+            # Treated like "not ready yet"; the timeout bounds retries
+            logger.warning(f"⚠️ Avatar status check failed for {job.talk_id}: {str(e)}")
+
+        now = time.time()
+        if now - job.created > self.timeout:
+            self._fail(job, "Video generation timed out")
+            return
+        job.interval = min(job.interval * self.backoff, self.max_interval)
+        job.next_check = now + job.interval
+
+    def _prune(self, now: float):
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished is not None and now - job.finished > self.job_ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    async def _run(self):
+        while True:
+            self.wakeup.clear()
+            now = time.time()
+            due = [job for job in self.rendering.values() if job.next_check <= now]
+            try:
+                if due:
+                    await asyncio.gather(*(self._check(job) for job in due))
+                self._prune(now)
+            except Exception as e:
+                logger.warning(f"⚠️ Avatar poller error: {str(e)}")
+
+            next_check = min((job.next_check for job in self.rendering.values()), default=None)
+            delay = self.job_ttl if next_check is None else max(0.0, next_check - time.time())
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def stats(self) -> Dict:
+        states: Dict[str, int] = {}
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return {
+            "jobs": states,
+            "rendering": len(self.rendering),
+            "status_checks": self.status_checks,
+            "cached_renders": len(self.renders),
+            "cache_hits": self.cache_hits,
+            "deduplicated": self.deduplicated,
+        }
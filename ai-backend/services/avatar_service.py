@@ -6,8 +6,15 @@ from typing import Optional, Dict
 import base64
 import json
 
+from services.http_clients import get_http_client
+from services.media_files import content_digest
+
 logger = logging.getLogger(__name__)
 
+# Dev/fallback avatar video in temp/ is named avatar_fallback_<digest>.mp4
+# (content-addressed; prepared once, so it needs no cleanup)
+FALLBACK_VIDEO_PREFIX = "avatar_fallback_"
+
 class AvatarService:
     def __init__(self):
         self.did_api_key = os.getenv("DID_API_KEY")
@@ -15,6 +22,9 @@ class AvatarService:
         self.default_presenter_id = os.getenv("DID_PRESENTER_ID", "amy-jcwCkr1grs")
         # Path to dummy video for development
         self.dummy_video_path = "dummy_avatar.mp4"
+        # Resolved once at startup and reused for every fallback response
+        self.fallback_video_path: Optional[str] = None
+        self.fallback_video_url = self._create_dummy_video()
         
     async def create_talking_avatar(self, text: str, avatar_id: str = "default") -> str:
         """Create talking avatar video using D-ID API or return dummy video"""
@@ -25,131 +35,138 @@ class AvatarService:
                 logger.info("D-ID API key not found, returning dummy video")
                 return self._create_dummy_video()
             
-            # If D-ID API is available, use the original implementation
-            presenter_id = self.default_presenter_id if avatar_id == "default" else avatar_id
+            talk_id = await self.start_talk(text, avatar_id)
             
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "accept": "application/json",
-                    "content-type": "application/json",
-                    "authorization": f"Basic {self.did_api_key}"
-                }
-                
-                # First, create the talk
-                talk_data = {
-                    "script": {
-                        "type": "text",
-                        "input": text
-                    },
-                    "source_url": f"https://create.d-id.com/api/presenters/{presenter_id}/image"
-                }
+            # Wait for video to be ready and return URL
+            video_url = await self._wait_for_video(talk_id)
+            return video_url
                 
-                # Create talk request
-                response = await client.post(
-                    f"{self.did_url}/talks",
-                    headers=headers,
-                    json=talk_data
-                )
-                
-                if response.status_code == 201:
-                    talk_response = response.json()
-                    talk_id = talk_response["id"]
-                    
-                    # Wait for video to be ready and return URL
-                    video_url = await self._wait_for_video(talk_id)
-                    return video_url
-                else:
-                    raise Exception(f"D-ID API error: {response.status_code} - {response.text}")
-                    
         except Exception as e:
             logger.error(f"Error creating talking avatar: {str(e)}")
             # Fallback to dummy video if API fails
             return self._create_dummy_video()
     
+    async def start_talk(self, text: str, avatar_id: str = "default", webhook_url: Optional[str] = None) -> str:
+        """Create a D-ID talk and return its id without waiting for the render"""
+        presenter_id = self.presenter_id(avatar_id)
+        
+        client = get_http_client("did")
+        headers = {
+            "accept": "application/json",
+            "content-type": "application/json",
+            "authorization": f"Basic {self.did_api_key}"
+        }
+        
+        talk_data = {
+            "script": {
+                "type": "text",
+                "input": text
+            },
+            "source_url": f"https://create.d-id.com/api/presenters/{presenter_id}/image"
+        }
+        if webhook_url:
+            # D-ID calls this when the render finishes
+            talk_data["webhook"] = webhook_url
+        
+        # Create talk request
+        response = await client.post(
+            f"{self.did_url}/talks",
+            headers=headers,
+            json=talk_data
+        )
+        
+        if response.status_code == 201:
+            return response.json()["id"]
+        raise Exception(f"D-ID API error: {response.status_code} - {response.text}")
+    
+    def presenter_id(self, avatar_id: str = "default") -> str:
+        return self.default_presenter_id if avatar_id == "default" else avatar_id
+    
+    async def get_talk(self, talk_id: str) -> dict:
+        """Current D-ID status of a talk ("created", "started", "done" or "error")"""
+        client = get_http_client("did")
+        headers = {
+            "accept": "application/json",
+            "authorization": f"Basic {self.did_api_key}"
+        }
+        
+        response = await client.get(
+            f"{self.did_url}/talks/{talk_id}",
+            headers=headers
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        raise Exception(f"Failed to check video status: {response.status_code}")
+    
     def _create_dummy_video(self) -> str:
         """Return dummy video URL for testing"""
-        # Copy the webapp's aiVideo.mp4 to temp directory and serve it
-        import shutil
-        
+        # Prepared once; only re-linked if the file was removed from temp/
+        if self.fallback_video_path is None or not os.path.exists(self.fallback_video_path):
+            self.fallback_video_url = self._prepare_fallback_video()
+        return self.fallback_video_url
+    
+    def _prepare_fallback_video(self) -> str:
+        """Make the webapp's aiVideo.mp4 servable from temp/ without copying it per request"""
         # Use absolute path to the webapp public directory
         # Current file: project_root/ai-backend/services/avatar_service.py
         # Need to go up 2 levels: services -> ai-backend -> project_root
         current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        webapp_video_path = os.path.join(current_dir, "WEBAPP", "public", "aiVideo.mp4")
-        dummy_video_filename = f"avatar_dummy_{abs(hash('dummy_video'))}.mp4"
-        dummy_video_path = f"temp/{dummy_video_filename}"
+        candidates = [
+            os.path.join(current_dir, "WEBAPP", "public", name)
+            for name in ("aiVideo.mp4", "aiVideo1.mp4", "aiVideo3.mp4")
+        ]
+        tmp_path = f"temp/{FALLBACK_VIDEO_PREFIX}video.tmp"
         
         try:
             # Ensure temp directory exists
             os.makedirs("temp", exist_ok=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             
-            logger.info(f"🔍 Looking for video at: {webapp_video_path}")
-            
-            # Copy video file if it exists
-            if os.path.exists(webapp_video_path):
-                shutil.copy2(webapp_video_path, dummy_video_path)
-                logger.info(f"✅ Copied dummy video from {webapp_video_path} to {dummy_video_path}")
-                return f"/video/{dummy_video_filename}"
-            else:
-                logger.warning(f"❌ Dummy video not found at {webapp_video_path}")
-                # Try alternative video files
-                alternative_paths = [
-                    os.path.join(current_dir, "WEBAPP", "public", "aiVideo1.mp4"),
-                    os.path.join(current_dir, "WEBAPP", "public", "aiVideo3.mp4")
-                ]
-                
-                for alt_path in alternative_paths:
-                    logger.info(f"🔍 Trying alternative: {alt_path}")
-                    if os.path.exists(alt_path):
-                        shutil.copy2(alt_path, dummy_video_path)
-                        logger.info(f"✅ Using alternative video: {alt_path}")
-                        return f"/video/{dummy_video_filename}"
-                
+            source = next((path for path in candidates if os.path.exists(path)), None)
+            if source is None:
                 # If no video files found, create a simple placeholder MP4
                 logger.warning("📄 No video files found, creating minimal placeholder")
-                self._create_placeholder_video(dummy_video_path)
-                return f"/video/{dummy_video_filename}"
+                self._create_placeholder_video(tmp_path)
+            else:
+                try:
+                    # Hard link: same file on disk, served by /video without a copy
+                    os.link(source, tmp_path)
+                    logger.info(f"🔗 Linked fallback video {source}")
+                except OSError:
+                    # Different filesystem (or no link support): copy once
+                    import shutil
+                    shutil.copy2(source, tmp_path)
+                    logger.info(f"✅ Copied fallback video from {source}")
+            
+            # Content-addressed name: safe for browsers/CDNs to cache forever
+            filename = f"{FALLBACK_VIDEO_PREFIX}{content_digest(tmp_path)[:32]}.mp4"
+            os.replace(tmp_path, f"temp/{filename}")
+            self.fallback_video_path = f"temp/{filename}"
+            return f"/video/{filename}"
             
         except Exception as e:
-            logger.error(f"❌ Error creating dummy video: {str(e)}")
-            # Create a minimal placeholder
-            try:
-                self._create_placeholder_video(dummy_video_path)
-                return f"/video/{dummy_video_filename}"
-            except:
-                return "/video/placeholder.mp4"
+            logger.error(f"❌ Error preparing dummy video: {str(e)}")
+            return "/video/placeholder.mp4"
     
     async def _wait_for_video(self, talk_id: str, max_attempts: int = 30) -> str:
         """Wait for D-ID video to be ready"""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "accept": "application/json",
-                    "authorization": f"Basic {self.did_api_key}"
-                }
+            for attempt in range(max_attempts):
+                result = await self.get_talk(talk_id)
+                status = result.get("status")
                 
-                for attempt in range(max_attempts):
-                    response = await client.get(
-                        f"{self.did_url}/talks/{talk_id}",
-                        headers=headers
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        status = result.get("status")
-                        
-                        if status == "done":
-                            return result.get("result_url")
-                        elif status == "error":
-                            raise Exception(f"Video generation failed: {result.get('error', {}).get('description')}")
-                        
-                        # Wait 2 seconds before next attempt
-                        await asyncio.sleep(2)
-                    else:
-                        raise Exception(f"Failed to check video status: {response.status_code}")
-                
-                raise Exception("Video generation timed out")
+                if status == "done":
+                    return result.get("result_url")
+                elif status == "error":
+                    raise Exception(f"Video generation failed: {result.get('error', {}).get('description')}")
                 
+                # Wait 2 seconds before next attempt
+                await asyncio.sleep(2)
+            
+            raise Exception("Video generation timed out")
+            
         except Exception as e:
             logger.error(f"Error waiting for video: {str(e)}")
             raise e
@@ -183,22 +200,22 @@ class AvatarService:
     async def get_available_presenters(self) -> list:
         """Get list of available D-ID presenters"""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "accept": "application/json",
-                    "authorization": f"Basic {self.did_api_key}"
-                }
-                
-                response = await client.get(
-                    f"{self.did_url}/presenters",
-                    headers=headers
-                )
+            client = get_http_client("did")
+            headers = {
+                "accept": "application/json",
+                "authorization": f"Basic {self.did_api_key}"
+            }
+            
+            response = await client.get(
+                f"{self.did_url}/presenters",
+                headers=headers
+            )
+            
+            if response.status_code == 200:
+                return response.json()["presenters"]
+            else:
+                raise Exception(f"Failed to get presenters: {response.status_code}")
                 
-                if response.status_code == 200:
-                    return response.json()["presenters"]
-                else:
-                    raise Exception(f"Failed to get presenters: {response.status_code}")
-                    
         except Exception as e:
             logger.error(f"Error getting presenters: {str(e)}")
             return []
@@ -206,31 +223,31 @@ class AvatarService:
     async def upload_custom_avatar(self, image_data: bytes, name: str) -> str:
         """Upload custom avatar image to D-ID"""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "accept": "application/json",
-                    "authorization": f"Basic {self.did_api_key}"
-                }
-                
-                # Convert image to base64
-                image_b64 = base64.b64encode(image_data).decode('utf-8')
-                
-                data = {
-                    "name": name,
-                    "image": f"data:image/jpeg;base64,{image_b64}"
-                }
-                
-                response = await client.post(
-                    f"{self.did_url}/images",
-                    headers=headers,
-                    json=data
-                )
+            client = get_http_client("did")
+            headers = {
+                "accept": "application/json",
+                "authorization": f"Basic {self.did_api_key}"
+            }
+            
+            # Convert image to base64
+            image_b64 = base64.b64encode(image_data).decode('utf-8')
+            
+            data = {
+                "name": name,
+                "image": f"data:image/jpeg;base64,{image_b64}"
+            }
+            
+            response = await client.post(
+                f"{self.did_url}/images",
+                headers=headers,
+                json=data
+            )
+            
+            if response.status_code == 201:
+                return response.json()["id"]
+            else:
+                raise Exception(f"Failed to upload avatar: {response.status_code} - {response.text}")
                 
-                if response.status_code == 201:
-                    return response.json()["id"]
-                else:
-                    raise Exception(f"Failed to upload avatar: {response.status_code} - {response.text}")
-                    
         except Exception as e:
             logger.error(f"Error uploading custom avatar: {str(e)}")
             raise e
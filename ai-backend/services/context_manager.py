@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from services.conversation_store import Conversation
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-message token overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """
+Update the running summary of a supportive conversation between a college student and a mental health assistant.
+Keep what matters for continuing the conversation: the student's feelings, stressors, important facts they shared,
+coping strategies already suggested and how they responded, and any signs of heavy distress.
+Write at most 150 words in the third person. Reply with the summary only.
+"""
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # tiktoken downloads its encoding on first use; fall back when offline
+        logger.warning(f"⚠️ tiktoken unavailable ({str(e)}), estimating tokens from length")
+        return None
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """Token count of `text` (cl100k_base, or ~4 characters per token as a fallback)"""
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text))
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+class ContextWindowManager:
+    """
+    Keeps each LLM prompt under a fixed token budget.
+
+    The prompt is the system prompt, the session's running summary, and as
+    many of the most recent turns as fit. Turns that fall out of the
+    conversation's verbatim window are folded into the summary by a
+    background task, so summarization never sits on the request path and
+    prompt size stays flat however long the session runs.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[List[Dict[str, str]]], Awaitable[str]],
+        max_prompt_tokens: int = 2000,
+    ):
+        self.summarize = summarize
+        self.max_prompt_tokens = max_prompt_tokens
+        self._tasks = set()
+
+    def build_messages(self, system_prompt: str, conversation: Conversation, user_message: str) -> List[Dict[str, str]]:
+        """Assemble the prompt for the next turn within the token budget"""
+        head = [{"role": "system", "content": system_prompt}]
+        if conversation.summary:
+            head.append({"role": "system", "content": f"Summary of the conversation so far:\n{conversation.summary}"})
+        tail = [{"role": "user", "content": user_message}]
+
+        budget = self.max_prompt_tokens - sum(message_tokens(m) for m in head + tail)
+
+        # Newest first: recent turns, then turns still waiting to be summarized
+        history: List[Dict[str, str]] = []
+        for message in reversed(conversation.unsummarized + conversation.messages):
+            cost = message_tokens(message)
+            if cost > budget:
+                break
+            budget -= cost
+            history.append(message)
+        history.reverse()
+
+        # A window should not open on a dangling assistant reply
+        while history and history[0]["role"] == "assistant":
+            history.pop(0)
+
+        return head + history + tail
+
+    def schedule_summary(self, conversation: Conversation):
+        """Fold overflowed turns into the running summary in the background"""
+        if not conversation.unsummarized or conversation.summarizing:
+            return
+        conversation.summarizing = True
+        task = asyncio.create_task(self._refresh_summary(conversation))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh_summary(self, conversation: Conversation):
+        try:
+            pending = list(conversation.unsummarized)
+            transcript = "\n".join(f"{m['role']}: {m['content']}" for m in pending)
+            prompt = [
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current summary:\n{conversation.summary or '(none)'}\n\nNew messages:\n{transcript}"},
+            ]
+            summary = (await self.summarize(prompt)).strip()
+            if summary:
+                # Turns kept arriving while we waited (and may have trimmed the
+                # backlog): drop exactly the messages that were summarized
+                async with conversation.lock:
+                    conversation.summary = summary
+                    folded = {id(m) for m in pending}
+                    conversation.unsummarized[:] = [m for m in conversation.unsummarized if id(m) not in folded]
+                logger.info(f"📝 Folded {len(pending)} messages into summary for {conversation.session_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Summary refresh failed for {conversation.session_id}: {str(e)}")
+        finally:
+            conversation.summarizing = False
+
+    async def close(self):
+        """Wait for in-flight summaries (used on shutdown)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
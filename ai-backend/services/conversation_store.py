@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Conversation:
+    """
+    Bounded message history for one chat session.
+
+    Messages pushed out of the verbatim window move to `unsummarized` until
+    the context manager folds them into the running `summary`.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        messages: Optional[List[Dict[str, str]]] = None,
+        max_messages: int = 40,
+        summary: str = "",
+        unsummarized: Optional[List[Dict[str, str]]] = None,
+    ):
+        self.session_id = session_id
+        self.max_messages = max_messages
+        self.messages: List[Dict[str, str]] = []
+        self.summary = summary
+        self.unsummarized: List[Dict[str, str]] = list(unsummarized or [])
+        self.summarizing = False
+        self.lock = asyncio.Lock()
+        self.last_active = time.time()
+        for message in messages or []:
+            self._push(message)
+
+    def _push(self, message: Dict[str, str]):
+        self.messages.append(message)
+        if len(self.messages) > self.max_messages:
+            overflow = len(self.messages) - self.max_messages
+            self.unsummarized.extend(self.messages[:overflow])
+            del self.messages[:overflow]
+            # Bound the backlog if summarization keeps failing
+            if len(self.unsummarized) > self.max_messages:
+                del self.unsummarized[:len(self.unsummarized) - self.max_messages]
+
+    def append(self, role: str, content: str):
+        self._push({"role": role, "content": content})
+        self.last_active = time.time()
+
+class ConversationStore:
+    """
+    Session-keyed conversation histories.
+
+    Active sessions live in an in-memory LRU; when it is full the least
+    recently used session is written to `storage_dir` as JSON and reloaded
+    transparently the next time that session chats. Each session has its
+    own lock, so concurrent users never serialize through one history.
+
+    Sessions idle for longer than `retention` seconds are forgotten: their
+    files are pruned on startup, on shutdown and (at most every
+    `prune_interval` seconds) whenever eviction writes to disk. A retention
+    of 0 keeps transcripts forever.
+    """
+
+    def __init__(
+        self,
+        max_active_sessions: int = 1000,
+        max_messages: int = 40,
+        storage_dir: str = "sessions",
+        retention: float = 7 * 24 * 3600,
+        prune_interval: float = 3600,
+    ):
+        self.max_active_sessions = max_active_sessions
+        self.max_messages = max_messages
+        self.storage_dir = storage_dir
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._active: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.last_prune = 0.0
+        self.pruned_sessions = 0
+        os.makedirs(self.storage_dir, exist_ok=True)
+        self.prune()
+
+    def _path(self, session_id: str) -> str:
+        # Hash the id so arbitrary client strings can't escape storage_dir
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.storage_dir, f"{digest}.json")
+
+    def _expired(self, last_active: float) -> bool:
+        return self.retention > 0 and time.time() - last_active > self.retention
+
+    def get(self, session_id: str) -> Conversation:
+        """Return the session's conversation, loading it from disk or creating it"""
+        conversation = self._active.get(session_id)
+        if conversation is not None and self._expired(conversation.last_active) and not conversation.lock.locked():
+            del self._active[session_id]
+            conversation = None
+        if conversation is None:
+            conversation = Conversation(session_id, max_messages=self.max_messages, **self._load(session_id))
+            self._active[session_id] = conversation
+            self._evict()
+        else:
+            self._active.move_to_end(session_id)
+        return conversation
+
+    def _load(self, session_id: str) -> Dict:
+        path = self._path(session_id)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if self._expired(data.get("last_active", 0)):
+                os.remove(path)
+                self.pruned_sessions += 1
+                return {}
+            return {
+                "messages": data.get("messages", []),
+                "summary": data.get("summary", ""),
+                "unsummarized": data.get("unsummarized", []),
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load conversation {session_id}: {str(e)}")
+            return {}
+
+    def _save(self, conversation: Conversation):
+        if self._expired(conversation.last_active):
+            return
+        path = self._path(conversation.session_id)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "session_id": conversation.session_id,
+                    "last_active": conversation.last_active,
+                    "messages": conversation.messages,
+                    "summary": conversation.summary,
+                    "unsummarized": conversation.unsummarized,
+                }, f)
+            # mtime doubles as last activity so prune() only needs to stat files
+            os.utime(path, (conversation.last_active, conversation.last_active))
+        except Exception as e:
+            logger.error(f"❌ Could not persist conversation {conversation.session_id}: {str(e)}")
+
+    def _evict(self):
+        while len(self._active) > self.max_active_sessions:
+            # Least recently used first; never the session just requested
+            # (the last one) or a session that is mid-request
+            candidates = islice(self._active.items(), len(self._active) - 1)
+            session_id = next((sid for sid, c in candidates if not c.lock.locked()), None)
+            if session_id is None:
+                break
+            conversation = self._active.pop(session_id)
+            self._save(conversation)
+            logger.info(f"💾 Evicted conversation {session_id} to disk")
+            if time.time() - self.last_prune >= self.prune_interval:
+                self._prune_in_background()
+
+    def _prune_in_background(self):
+        self.last_prune = time.time()
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self.prune)
+        except RuntimeError:
+            # No event loop (scripts): prune inline
+            self.prune()
+
+    def prune(self) -> int:
+        """Delete stored sessions idle for longer than the retention period; returns how many"""
+        self.last_prune = time.time()
+        if self.retention <= 0:
+            return 0
+        cutoff = time.time() - self.retention
+        removed = 0
+        try:
+            with os.scandir(self.storage_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                            removed += 1
+                    except FileNotFoundError:
+                        pass
+        except OSError as e:
+            logger.warning(f"⚠️ Could not prune stored conversations: {str(e)}")
+        if removed:
+            self.pruned_sessions += removed
+            logger.info(f"🧹 Removed {removed} conversations idle for more than {self.retention / 3600:g}h")
+        return removed
+
+    def reset(self, session_id: str):
+        """Forget a session in memory and on disk"""
+        self._active.pop(session_id, None)
+        path = self._path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def flush(self):
+        """Persist every active session that is still within retention (used on shutdown)"""
+        for conversation in self._active.values():
+            self._save(conversation)
+        self.prune()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "active_sessions": len(self._active),
+            "max_active_sessions": self.max_active_sessions,
+            "max_messages_per_session": self.max_messages,
+            "retention_hours": self.retention / 3600,
+            "pruned_sessions": self.pruned_sessions,
+        }
@@ -1,6 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from pymongo.errors import ConnectionFailure
+import asyncio
 import os
+import time
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 import logging
@@ -8,38 +11,127 @@ from bson import ObjectId
 
 logger = logging.getLogger(__name__)
 
+class HeartbeatMonitor(monitoring.ServerHeartbeatListener):
+    """Track MongoDB reachability from the driver's own background heartbeats (no extra pings)"""
+
+    def __init__(self):
+        self.healthy = False
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.round_trip_ms: Optional[float] = None
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if not self.healthy:
+            logger.info(f"✅ MongoDB reachable at {event.connection_id[0]}:{event.connection_id[1]}")
+        self.healthy = True
+        self.last_success = time.time()
+        self.round_trip_ms = round(event.duration * 1000, 2)
+
+    def failed(self, event):
+        if self.healthy:
+            logger.warning(f"⚠️ MongoDB heartbeat failed: {event.reply}")
+        self.healthy = False
+        self.last_failure = time.time()
+        self.last_error = str(event.reply)
+
 class DatabaseService:
+    """
+    MongoDB access over one long-lived, pooled client per worker process
+
+    The app connects once on startup and closes the client on shutdown;
+    request handlers never open connections or ping. Each worker holds at
+    most MONGODB_MAX_POOL_SIZE connections, so the total across workers is
+    bounded by workers x pool size.
+    """
+
     def __init__(self):
         self.mongodb_url = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
         self.database_name = os.getenv("DATABASE_NAME", "ai_therapist")
+        self.max_pool_size = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+        self.min_pool_size = int(os.getenv("MONGODB_MIN_POOL_SIZE", "5"))
+        self.max_idle_time_ms = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+        self.server_selection_timeout_ms = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+        self.heartbeat_frequency_ms = int(os.getenv("MONGODB_HEARTBEAT_FREQUENCY_MS", "10000"))
         self.client = None
         self.db = None
+        self.monitor = HeartbeatMonitor()
+        self._connect_lock = asyncio.Lock()
+        self._warmup: Optional[asyncio.Task] = None
         
-    async def connect(self):
-        """Connect to MongoDB"""
+    async def connect(self, verify: bool = True):
+        """Create the pooled client (once); with verify, also ping the server"""
+        async with self._connect_lock:
+            if self.client is None:
+                self.client = AsyncIOMotorClient(
+                    self.mongodb_url,
+                    maxPoolSize=self.max_pool_size,
+                    minPoolSize=self.min_pool_size,
+                    maxIdleTimeMS=self.max_idle_time_ms,
+                    serverSelectionTimeoutMS=self.server_selection_timeout_ms,
+                    heartbeatFrequencyMS=self.heartbeat_frequency_ms,
+                    appname="ai-therapist-backend",
+                    event_listeners=[self.monitor],
+                )
+                self.db = self.client[self.database_name]
+                logger.info(f"MongoDB client created (pool {self.min_pool_size}-{self.max_pool_size})")
+        
+        if verify:
+            try:
+                # Test connection
+                await self.client.admin.command('ping')
+                logger.info("Successfully connected to MongoDB")
+            except ConnectionFailure as e:
+                logger.error(f"Failed to connect to MongoDB: {str(e)}")
+                raise e
+        elif self._warmup is None:
+            # The driver only starts monitoring (and fills minPoolSize) on first use
+            self._warmup = asyncio.create_task(self._warm_up())
+    
+    async def _warm_up(self):
         try:
-            self.client = AsyncIOMotorClient(self.mongodb_url)
-            self.db = self.client[self.database_name]
-            
-            # Test connection
             await self.client.admin.command('ping')
             logger.info("Successfully connected to MongoDB")
-            
-        except ConnectionFailure as e:
-            logger.error(f"Failed to connect to MongoDB: {str(e)}")
-            raise e
+        except Exception as e:
+            logger.warning(f"⚠️ MongoDB not reachable yet: {str(e)}")
     
     async def disconnect(self):
         """Disconnect from MongoDB"""
+        if self._warmup is not None:
+            self._warmup.cancel()
+            self._warmup = None
         if self.client:
             self.client.close()
+            self.client = None
+            self.db = None
             logger.info("Disconnected from MongoDB")
     
+    async def _database(self):
+        # Only scripts that skip app startup get here without a client
+        if self.db is None:
+            await self.connect(verify=False)
+        return self.db
+    
+    def health(self) -> Dict:
+        """Connection status as last seen by the driver's heartbeats"""
+        return {
+            "connected": self.client is not None,
+            "healthy": self.monitor.healthy,
+            "round_trip_ms": self.monitor.round_trip_ms,
+            "last_success": self.monitor.last_success,
+            "last_failure": self.monitor.last_failure,
+            "last_error": self.monitor.last_error,
+            "max_pool_size": self.max_pool_size,
+            "min_pool_size": self.min_pool_size,
+        }
+    
     async def create_session(self, user_id: str) -> str:
         """Create a new therapy session"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
             session_data = {
                 "user_id": user_id,
@@ -51,7 +143,7 @@ class DatabaseService:
                 "status": "active"
             }
             
-            result = await self.db.sessions.insert_one(session_data)
+            result = await db.sessions.insert_one(session_data)
             return str(result.inserted_id)
             
         except Exception as e:
@@ -61,10 +153,9 @@ class DatabaseService:
     async def get_session(self, session_id: str) -> Optional[Dict]:
         """Get session by ID"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
-            session = await self.db.sessions.find_one({"_id": ObjectId(session_id)})
+            session = await db.sessions.find_one({"_id": ObjectId(session_id)})
             
             if session:
                 session["_id"] = str(session["_id"])
@@ -78,12 +169,11 @@ class DatabaseService:
     async def update_session(self, session_id: str, update_data: Dict) -> bool:
         """Update session with new data"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
             update_data["updated_at"] = datetime.now(timezone.utc)
             
-            result = await self.db.sessions.update_one(
+            result = await db.sessions.update_one(
                 {"_id": ObjectId(session_id)},
                 {"$set": update_data}
             )
@@ -97,12 +187,11 @@ class DatabaseService:
     async def add_message(self, session_id: str, message: Dict) -> bool:
         """Add message to session"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
             message["timestamp"] = datetime.now(timezone.utc)
             
-            result = await self.db.sessions.update_one(
+            result = await db.sessions.update_one(
                 {"_id": ObjectId(session_id)},
                 {
                     "$push": {"messages": message},
@@ -119,12 +208,11 @@ class DatabaseService:
     async def add_emotion_data(self, session_id: str, emotion_data: Dict) -> bool:
         """Add emotion detection data to session"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
             emotion_data["timestamp"] = datetime.now(timezone.utc)
             
-            result = await self.db.sessions.update_one(
+            result = await db.sessions.update_one(
                 {"_id": ObjectId(session_id)},
                 {
                     "$push": {"emotions_detected": emotion_data},
@@ -141,10 +229,9 @@ class DatabaseService:
     async def get_user_sessions(self, user_id: str, limit: int = 10) -> List[Dict]:
         """Get recent sessions for a user"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
-            cursor = self.db.sessions.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
+            cursor = db.sessions.find({"user_id": user_id}).sort("created_at", -1).limit(limit)
             sessions = []
             
             async for session in cursor:
@@ -160,13 +247,12 @@ class DatabaseService:
     async def create_user(self, user_data: Dict) -> str:
         """Create a new user"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
             user_data["created_at"] = datetime.now(timezone.utc)
             user_data["updated_at"] = datetime.now(timezone.utc)
             
-            result = await self.db.users.insert_one(user_data)
+            result = await db.users.insert_one(user_data)
             return str(result.inserted_id)
             
         except Exception as e:
@@ -176,10 +262,9 @@ class DatabaseService:
     async def get_user(self, user_id: str) -> Optional[Dict]:
         """Get user by ID"""
         try:
-            if not self.db:
-                await self.connect()
+            db = await self._database()
                 
-            user = await self.db.users.find_one({"_id": ObjectId(user_id)})
+            user = await db.users.find_one({"_id": ObjectId(user_id)})
             
             if user:
                 user["_id"] = str(user["_id"])
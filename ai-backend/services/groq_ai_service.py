@@ -1,6 +1,7 @@
 import os
 from dotenv import load_dotenv
-from groq import Groq
+
+from services.llm_client import get_llm_client
 
 # Load .env variables
 load_dotenv()
@@ -10,9 +11,6 @@ api_key = os.getenv("GROQ_API_KEY")
 if not api_key:
     raise ValueError("❌ GROQ_API_KEY is not set in environment variables!")
 
-# Initialize Groq client
-client = Groq(api_key=api_key)
-
 # System prompt (same as your Groq version)
 SYSTEM_PROMPT = """
 You are a supportive, non-clinical mental health assistant for college students. 
@@ -33,40 +31,6 @@ Your goals:
 - Keep responses natural, warm, and 3–6 sentences long.
 """
 
-# Conversation history to maintain context
-conversation_history = [
-    {"role": "system", "content": SYSTEM_PROMPT}
-]
-
-# Main function to use in UI (same interface as before)
-def get_bot_reply(user_message: str) -> str:
-    """
-    Takes a user message, sends it to Groq, returns the reply.
-    Preserves conversation history within the session.
-    """
-    global conversation_history
-    
-    try:
-        # Add user message to history
-        conversation_history.append({"role": "user", "content": user_message})
-        
-        # Call Groq API with full history
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=conversation_history,
-            max_tokens=300,
-            temperature=0.7
-        )
-        
-        bot_message = response.choices[0].message.content
-        
-        # Add bot reply to history
-        conversation_history.append({"role": "assistant", "content": bot_message})
-        
-        return bot_message.strip()
-    except Exception as e:
-        return f"❌ Groq Error: {str(e)}"
-
 class GeminiService:
     """
     Groq-powered AI service for therapy responses
@@ -77,6 +41,8 @@ class GeminiService:
         self.conversation_history = [
             {"role": "system", "content": SYSTEM_PROMPT}
         ]
+        # Shared async client so the request never blocks the event loop
+        self.client = get_llm_client()
     
     async def generate_therapy_response(self, user_message: str, emotion: str = "neutral") -> str:
         """
@@ -94,7 +60,7 @@ class GeminiService:
             self.conversation_history.append({"role": "user", "content": user_message})
             
             # Call Groq API with full history
-            response = client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="llama-3.1-8b-instant",
                 messages=self.conversation_history,
                 max_tokens=300,
@@ -112,11 +78,17 @@ class GeminiService:
 
 # Optional: test from terminal
 if __name__ == "__main__":
-    print("Groq Health-Bot is running. Type 'exit' to quit.\n")
-    while True:
-        user_input = input("You: ")
-        if user_input.lower() in ["exit", "quit", "bye"]:
-            print("Bot: Take care! Ending the session now.")
-            break
-        reply = get_bot_reply(user_input)
-        print("Bot:", reply)
+    import asyncio
+
+    async def chat():
+        service = GeminiService()
+        print("Groq Health-Bot is running. Type 'exit' to quit.\n")
+        while True:
+            user_input = input("You: ")
+            if user_input.lower() in ["exit", "quit", "bye"]:
+                print("Bot: Take care! Ending the session now.")
+                break
+            reply = await service.generate_therapy_response(user_input)
+            print("Bot:", reply)
+
+    asyncio.run(chat())
@@ -0,0 +1,49 @@
+import logging
+import os
+from typing import Dict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Connection pool settings per upstream API, overridable with <NAME>_* env vars
+UPSTREAMS = {
+    "elevenlabs": {"timeout": 60.0, "max_connections": 20},
+    "did": {"timeout": 30.0, "max_connections": 10},
+}
+
+# One keep-alive pool per upstream, shared by every request in this worker process
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    config = UPSTREAMS[name]
+    prefix = name.upper()
+    max_connections = int(os.getenv(f"{prefix}_MAX_CONNECTIONS", str(config["max_connections"])))
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(float(os.getenv(f"{prefix}_TIMEOUT", str(config["timeout"]))), connect=10.0),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY", "30")),
+        ),
+    )
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Return the pooled client for an upstream ("elevenlabs" or "did"), creating it on first use"""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _create_client(name)
+    return client
+
+def open_http_clients():
+    """Create every upstream pool up front (used on startup)"""
+    for name in UPSTREAMS:
+        get_http_client(name)
+    logger.info(f"✅ HTTP client pools ready: {', '.join(UPSTREAMS)}")
+
+async def close_http_clients():
+    """Close every upstream pool (used on shutdown)"""
+    for name, client in list(_clients.items()):
+        await client.aclose()
+        del _clients[name]
+    logger.info("Closed HTTP client pools")
@@ -0,0 +1,44 @@
+import logging
+import os
+from typing import Optional
+
+import httpx
+from groq import AsyncGroq
+
+logger = logging.getLogger(__name__)
+
+# One AsyncGroq client (and HTTP connection pool) per worker process
+_client: Optional[AsyncGroq] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def get_llm_client() -> AsyncGroq:
+    """Return the shared async Groq client, creating its connection pool on first use"""
+    global _client
+    if _client is None:
+        http2 = os.getenv("LLM_HTTP2", "true").lower() == "true" and _http2_available()
+        http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "60")), connect=10.0),
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "200")),
+                max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "50")),
+                keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+            ),
+        )
+        _client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+        logger.info(f"✅ Async Groq client ready (HTTP/{'2' if http2 else '1.1'})")
+    return _client
+
+async def close_llm_client():
+    """Close the shared client's connection pool (used on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+        logger.info("Closed async Groq client")
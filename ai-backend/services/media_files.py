@@ -0,0 +1,129 @@
+import hashlib
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Prefixes of files named after a digest of their own bytes (see content_digest);
+# these never change under that name. tts_<digest>.mp3 is not one of them: its
+# digest covers the request, and re-synthesis after eviction writes new bytes.
+CONTENT_DIGEST_PREFIXES = ("avatar_fallback_",)
+CONTENT_ADDRESSED = re.compile(
+    r"^(?:" + "|".join(re.escape(prefix) for prefix in CONTENT_DIGEST_PREFIXES) + r")(?P<digest>[0-9a-f]{32,64})\.[a-z0-9]+$"
+)
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+def content_digest(path: str) -> str:
+    """Hex sha256 of a file, for building content-addressed names"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def media_headers(name: str, stat_result: os.stat_result) -> Dict[str, str]:
+    """ETag and caching headers for a generated media file"""
+    match = CONTENT_ADDRESSED.match(name)
+    if match:
+        etag, cache_control = match.group("digest"), IMMUTABLE
+    else:
+        # Name may be reused for new content (a rewrite is a new inode and mtime):
+        # cache, but revalidate every time
+        etag = hashlib.md5(f"{stat_result.st_ino}-{stat_result.st_mtime_ns}-{stat_result.st_size}".encode()).hexdigest()
+        cache_control = REVALIDATE
+    return {"etag": f'"{etag}"', "cache-control": cache_control, "accept-ranges": "bytes"}
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single `bytes=` range, or None if it isn't satisfiable"""
+    match = RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        # Suffix range: the final N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, end
+
+class RangeFileResponse(FileResponse):
+    """206 Partial Content for one byte range of a file"""
+
+    def __init__(self, path: str, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the body anyway
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles for generated audio/video with browser and CDN friendly caching
+
+    Files named after a digest of their content (avatar_fallback_<digest>.mp4)
+    get that digest as a strong ETag and an immutable Cache-Control. Anything
+    else, including request-keyed TTS cache files, gets an ETag from its
+    inode, mtime and size and is revalidated.
+    Single byte ranges are honoured so players can seek without downloading
+    the whole file.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+        headers = media_headers(os.path.basename(full_path), stat_result)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=method, headers=headers)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if status_code != 200 or not range_header:
+            return response
+        if_range = request_headers.get("if-range")
+        if if_range and if_range != headers["etag"]:
+            # Representation changed since the client's partial copy: send all of it
+            return response
+
+        byte_range = parse_range(range_header, stat_result.st_size)
+        if byte_range is None:
+            if "," in range_header:
+                # Multiple ranges aren't supported; the full file is a valid answer
+                return response
+            # An error, not the file: no caching headers, or the 416 would be cached as immutable
+            return Response(
+                status_code=416,
+                headers={"content-range": f"bytes */{stat_result.st_size}", "etag": headers["etag"]},
+            )
+        return RangeFileResponse(full_path, *byte_range, stat_result=stat_result, method=method, headers=headers)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at . ! or ? (plus closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+# Words whose trailing period doesn't end a sentence ("Dr. Lee", "e.g. sleep")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "e.g", "i.e", "approx"}
+LAST_WORD = re.compile(r'([\w.]+)\.$')
+
+def _is_abbreviation(text: str) -> bool:
+    """True if text ends with a known abbreviation or a single initial ("J.")"""
+    match = LAST_WORD.search(text)
+    if match is None:
+        return False
+    word = match.group(1).lower()
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+class SentenceSplitter:
+    """
+    Incrementally split streamed text into complete sentences
+
+    Sentences shorter than `min_chars` are merged with the next one so TTS
+    isn't called for fragments like "Hi." on their own.
+    """
+
+    def __init__(self, min_chars: int = 12):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns the sentences it completed"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            if len(sentence) < self.min_chars or _is_abbreviation(sentence):
+                continue
+            sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self) -> List[str]:
+        """Whatever is left once the stream has ended"""
+        sentence = self.buffer.strip()
+        self.buffer = ""
+        return [sentence] if sentence else []
+
+class SpeechPipeline:
+    """
+    Stream a chat reply while synthesizing it sentence by sentence
+
+    Each completed sentence is sent to TTS right away (at most
+    `max_concurrency` requests in flight); audio events are emitted in
+    sentence order as soon as the next one is ready, interleaved with the
+    token events of the reply still being generated.
+    """
+
+    def __init__(self, speak: Callable[[str], Awaitable[str]], max_concurrency: int = 3, min_sentence_chars: int = 12):
+        self.speak = speak
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.min_sentence_chars = min_sentence_chars
+
+    async def _speak(self, sentence: str) -> str:
+        async with self.semaphore:
+            return await self.speak(sentence)
+
+    async def run(
+        self,
+        tokens: AsyncIterator[str],
+        finalize: Optional[Callable[[str], Awaitable[Dict]]] = None,
+    ) -> AsyncIterator[Dict]:
+        """
+        Yields events as dicts with an "event" key:
+            token  - {"token"}
+            audio  - {"index", "text", "audio_url"}, in sentence order
+            error  - {"detail"} if the reply stream failed
+            done   - {"response", "audio_urls", **finalize(response)}
+
+        `finalize` is started as soon as the full reply is known.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        speech: asyncio.Queue = asyncio.Queue()  # (sentence, task) in order, None when the reply is complete
+        reply = {"text": "", "error": None, "final": None}
+
+        async def produce():
+            splitter = SentenceSplitter(self.min_sentence_chars)
+            parts = []
+            try:
+                async for token in tokens:
+                    parts.append(token)
+                    await events.put({"event": "token", "token": token})
+                    for sentence in splitter.feed(token):
+                        await speech.put((sentence, asyncio.create_task(self._speak(sentence))))
+                for sentence in splitter.flush():
+                    await speech.put((sentence, asyncio.create_task(self._speak(sentence))))
+                reply["text"] = "".join(parts).strip()
+                if finalize:
+                    # Runs alongside the remaining speech synthesis
+                    reply["final"] = asyncio.create_task(finalize(reply["text"]))
+            except Exception as e:
+                reply["error"] = str(e)
+            finally:
+                await speech.put(None)
+                if hasattr(tokens, "aclose"):
+                    await tokens.aclose()
+
+        async def emit_audio():
+            audio_urls = []
+            while True:
+                item = await speech.get()
+                if item is None:
+                    break
+                sentence, task = item
+                try:
+                    audio_url = await task
+                except Exception as e:
+                    logger.error(f"❌ Speech synthesis failed for sentence {len(audio_urls)}: {str(e)}")
+                    audio_url = None
+                await events.put({"event": "audio", "index": len(audio_urls), "text": sentence, "audio_url": audio_url})
+                audio_urls.append(audio_url)
+
+            try:
+                if reply["error"] is not None:
+                    await events.put({"event": "error", "detail": reply["error"]})
+                else:
+                    extra = await reply["final"] if reply["final"] else {}
+                    await events.put({"event": "done", "response": reply["text"], "audio_urls": audio_urls, **extra})
+            except Exception as e:
+                await events.put({"event": "error", "detail": str(e)})
+            finally:
+                await events.put(None)
+
+        workers = [asyncio.create_task(produce()), asyncio.create_task(emit_audio())]
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Client went away (or we're done): stop generating and synthesizing
+            for worker in workers:
+                worker.cancel()
+            if reply["final"]:
+                reply["final"].cancel()
+            while not speech.empty():
+                item = speech.get_nowait()
+                if item is not None:
+                    item[1].cancel()
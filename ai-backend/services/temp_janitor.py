@@ -0,0 +1,122 @@
+import asyncio
+import fnmatch
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Leftovers of interrupted writes. Everything else in temp/ is bounded by its
+# owner: the TTS cache evicts tts_*.mp3, fallback tones come in a few fixed
+# durations and the fallback avatar video is a single file.
+STALE_PATTERNS = (
+    "*.part",
+    "*.tmp",
+)
+
+class TempJanitor:
+    """
+    Remove stale partial files from temp/ in the background
+
+    Files are written under a temporary name and renamed into place when
+    complete, so a crash or a dropped stream can leave one behind. Every
+    `interval` seconds the directory is scanned in a worker thread and
+    partial files older than `max_age` (no longer being written) are
+    removed. Nothing here runs on the request path.
+    """
+
+    def __init__(
+        self,
+        directory: str = "temp",
+        max_age: float = 3600,
+        interval: float = 60,
+        patterns: Tuple[str, ...] = STALE_PATTERNS,
+    ):
+        self.directory = directory
+        self.max_age = max_age
+        self.interval = interval
+        self.patterns = patterns
+        self.task: Optional[asyncio.Task] = None
+
+        self.sweeps = 0
+        self.evicted_files = 0
+        self.reclaimed_bytes = 0
+        self.last_sweep_ms = 0.0
+
+    def owns(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def sweep(self):
+        """Remove partial files older than max_age (runs in a worker thread)"""
+        start = time.perf_counter()
+        now = time.time()
+        removed = 0
+        reclaimed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not self.owns(entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                    if now - stat.st_mtime <= self.max_age:
+                        continue
+                    os.remove(entry.path)
+                    removed += 1
+                    reclaimed += stat.st_size
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not remove {entry.path}: {str(e)}")
+
+        self.sweeps += 1
+        self.evicted_files += removed
+        self.reclaimed_bytes += reclaimed
+        self.last_sweep_ms = (time.perf_counter() - start) * 1000
+        if removed:
+            logger.info(f"🧹 Removed {removed} stale temp files ({reclaimed / 1e6:.1f} MB)")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.warning(f"⚠️ Temp cleanup failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def stats(self) -> Dict:
+        return {
+            "max_age_seconds": self.max_age,
+            "sweeps": self.sweeps,
+            "evicted_files": self.evicted_files,
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "last_sweep_ms": round(self.last_sweep_ms, 2),
+        }
+
+# One janitor per worker process
+_janitor: Optional[TempJanitor] = None
+
+def get_temp_janitor() -> TempJanitor:
+    """Return the shared janitor for temp/, configured from the environment"""
+    global _janitor
+    if _janitor is None:
+        _janitor = TempJanitor(
+            directory="temp",
+            max_age=float(os.getenv("TEMP_MAX_AGE_SECONDS", "3600")),
+            interval=float(os.getenv("TEMP_CLEANUP_INTERVAL", "60")),
+        )
+    return _janitor
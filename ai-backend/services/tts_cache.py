@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech
+
+    Files are stored as `{prefix}{digest}.mp3` in `directory`, where the digest
+    covers everything that affects the audio (text, voice, model, settings), so
+    the same utterance always maps to the same file. An in-memory LRU index
+    keeps the total size under `max_bytes`; it is rebuilt from disk on startup.
+    """
+
+    def __init__(self, directory: str = "temp", max_bytes: int = 200 * 1024 * 1024, prefix: str = "tts_"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self.entries: "OrderedDict[str, int]" = OrderedDict()  # filename -> size, least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(text: str, voice_id: str, model_id: str, voice_settings: Dict) -> str:
+        """Stable digest of a TTS request (unlike hash(), the same across processes and restarts)"""
+        payload = json.dumps(
+            {"text": text, "voice_id": voice_id, "model_id": model_id, "voice_settings": voice_settings},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def filename(self, key: str) -> str:
+        return f"{self.prefix}{key}.mp3"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, self.filename(key))
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.prefix) and name.endswith(".mp3"):
+                stat = os.stat(os.path.join(self.directory, name))
+                files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+            self.total_bytes += size
+        if files:
+            logger.info(f"🗂️ TTS cache: {len(files)} files ({self.total_bytes / 1e6:.1f} MB) on disk")
+        self._evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """Filename of the cached audio, or None"""
+        name = self.filename(key)
+        if name not in self.entries:
+            self.misses += 1
+            return None
+        if not os.path.exists(os.path.join(self.directory, name)):
+            # Removed behind our back
+            self.total_bytes -= self.entries.pop(name)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(name)
+        self.hits += 1
+        return name
+
+    def put(self, key: str, audio: bytes) -> str:
+        """Store audio for `key`; returns its filename"""
+        with self.open_temp() as f:
+            f.write(audio)
+        return self.commit(key, f.name)
+
+    def open_temp(self):
+        """Open a uniquely named file in the cache directory to write audio into before commit()"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=self.prefix, suffix=".part")
+        os.close(fd)
+        return open(tmp_path, "wb")
+
+    def commit(self, key: str, tmp_path: str) -> str:
+        """Move a fully written temp file into place as the audio for `key`; returns its filename"""
+        path = self.path(key)
+        # Readers never see a partially written file
+        os.replace(tmp_path, path)
+        self.add(self.filename(key), os.path.getsize(path))
+        return self.filename(key)
+
+    def add(self, name: str, size: int):
+        """Index a file already written into the cache directory"""
+        if name in self.entries:
+            self.total_bytes -= self.entries.pop(name)
+        self.entries[name] = size
+        self.total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            name, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "files": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
@@ -2,16 +2,39 @@ import httpx
 import os
 import logging
 import time
-import random
-from typing import Optional
+from typing import AsyncIterator, Optional, Tuple
+
+from services.http_clients import get_http_client
+from services.tts_cache import TTSCache
 
 logger = logging.getLogger(__name__)
 
+# Fallback tone lengths in seconds: a reply gets the shortest one that covers
+# it (the longest for anything beyond), so at most this many tones are on disk
+FALLBACK_TONE_SECONDS = (2, 4, 8, 15)
+
+def fallback_tone_seconds(text: str) -> int:
+    """Tone length for a reply, from ~0.05s per character"""
+    estimate = len(text) * 0.05
+    return next((seconds for seconds in FALLBACK_TONE_SECONDS if seconds >= estimate), FALLBACK_TONE_SECONDS[-1])
+
 class TTSService:
     def __init__(self):
         self.elevenlabs_api_key = os.getenv("ELEVENLABS_API_KEY")
         self.elevenlabs_url = "https://api.elevenlabs.io/v1"
         self.default_voice_id = os.getenv("ELEVENLABS_VOICE_ID", "nLiZs38w2b9S5WVDWipV")  # Sia voice ID
+        self.model_id = "eleven_monolingual_v1"
+        self.voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.5
+        }
+        # Rendered fallback tones by duration (one of FALLBACK_TONE_SECONDS)
+        self._fallback_tones = {}
+        # Repeated utterances are served from disk instead of calling ElevenLabs again
+        self.cache = TTSCache(
+            directory="temp",
+            max_bytes=int(os.getenv("TTS_CACHE_MAX_MB", "200")) * 1024 * 1024,
+        )
         
         if self.elevenlabs_api_key:
             logger.info(f"✅ ElevenLabs API key loaded")
@@ -25,60 +48,61 @@ class TTSService:
             if not self.elevenlabs_api_key:
                 return {"error": "API key not available"}
                 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                headers = {
-                    "Accept": "application/json",
-                    "xi-api-key": self.elevenlabs_api_key
-                }
-                
-                response = await client.get(
-                    f"{self.elevenlabs_url}/user",
-                    headers=headers
-                )
+            client = get_http_client("elevenlabs")
+            headers = {
+                "Accept": "application/json",
+                "xi-api-key": self.elevenlabs_api_key
+            }
+            
+            response = await client.get(
+                f"{self.elevenlabs_url}/user",
+                headers=headers,
+                timeout=30.0
+            )
+            
+            if response.status_code == 200:
+                user_data = response.json()
+                logger.info(f"✅ API Key is valid! User: {user_data.get('first_name', 'Unknown')}")
+                logger.info(f"Character limit: {user_data.get('subscription', {}).get('character_limit', 'N/A')}")
+                logger.info(f"Tokens available: {user_data.get('subscription', {}).get('character_count', 'N/A')}")
+                return user_data
+            else:
+                logger.error(f"❌ Failed to get account info: {response.status_code}")
+                return {"error": f"API error: {response.status_code}"}
                 
-                if response.status_code == 200:
-                    user_data = response.json()
-                    logger.info(f"✅ API Key is valid! User: {user_data.get('first_name', 'Unknown')}")
-                    logger.info(f"Character limit: {user_data.get('subscription', {}).get('character_limit', 'N/A')}")
-                    logger.info(f"Tokens available: {user_data.get('subscription', {}).get('character_count', 'N/A')}")
-                    return user_data
-                else:
-                    logger.error(f"❌ Failed to get account info: {response.status_code}")
-                    return {"error": f"API error: {response.status_code}"}
-                    
         except Exception as e:
             logger.error(f"❌ Error checking account: {str(e)}")
             return {"error": str(e)}
 
     async def generate_speech(self, text: str, voice: str = "default") -> str:
         """Generate speech from text using ElevenLabs API or create dummy audio"""
-        # Clean up old files periodically
-        self._cleanup_old_files()
-        
         try:
+            voice_id = self.default_voice_id if voice == "default" else voice
+            cache_key = TTSCache.key(text, voice_id, self.model_id, self.voice_settings)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info(f"⚡ TTS cache hit for: '{text[:50]}...'")
+                return f"/audio/{cached}"
+
             # Check if API key is available
             if not self.elevenlabs_api_key:
                 logger.warning("ElevenLabs API key not found, creating dummy audio response")
                 return self._create_dummy_audio(text)
             
-            voice_id = self.default_voice_id if voice == "default" else voice
             logger.info(f"🎤 Generating speech for: '{text[:50]}...' with voice: {voice_id}")
             
             # Generate speech using ElevenLabs API
             async def make_elevenlabs_request():
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    headers = {"xi-api-key": self.elevenlabs_api_key}
-                    data = {
-                        "text": text,
-                        "model_id": "eleven_monolingual_v1",
-                        "voice_settings": {
-                            "stability": 0.5,
-                            "similarity_boost": 0.5
-                        }
-                    }
-                    url = f"{self.elevenlabs_url}/text-to-speech/{voice_id}"
-                    response = await client.post(url, headers=headers, json=data)
-                    return response
+                client = get_http_client("elevenlabs")
+                headers = {"xi-api-key": self.elevenlabs_api_key}
+                data = {
+                    "text": text,
+                    "model_id": self.model_id,
+                    "voice_settings": self.voice_settings
+                }
+                url = f"{self.elevenlabs_url}/text-to-speech/{voice_id}"
+                response = await client.post(url, headers=headers, json=data)
+                return response
             
             response = await make_elevenlabs_request()
             
@@ -88,17 +112,8 @@ class TTSService:
                 # Success! We have audio data, not JSON
                 logger.info(f"✅ Successfully received audio data from ElevenLabs")
                 
-                # Save audio file with unique timestamp to prevent caching
-                timestamp = int(time.time() * 1000)  # milliseconds
-                text_hash = abs(hash(text))
-                audio_filename = f"elevenlabs_audio_{text_hash}_{timestamp}.mp3"
-                audio_path = f"temp/{audio_filename}"
-                
-                # Ensure temp directory exists
-                os.makedirs("temp", exist_ok=True)
-                
-                with open(audio_path, "wb") as f:
-                    f.write(response.content)
+                # Content-addressed file: the same request maps to the same file
+                audio_filename = self.cache.put(cache_key, response.content)
                 
                 logger.info(f"✅ Successfully generated real TTS audio: {audio_filename}")
                 # Return URL path for FastAPI static serving
@@ -143,46 +158,112 @@ class TTSService:
             logger.exception("Full traceback:")
             return self._create_dummy_audio(text)
     
+    async def open_speech_stream(self, text: str, voice: str = "default") -> Tuple[AsyncIterator[bytes], str]:
+        """
+        Start streaming speech; returns (chunks, media type)
+
+        ElevenLabs MP3 chunks are passed through while it is still generating
+        and written to the TTS cache on the way, so the next request for the
+        same text is served from disk. The upstream request is made here,
+        before the first byte goes out, so a failure can still switch to the
+        fallback audio, whose media type (WAV tone or MP3 placeholder) is
+        reported as-is.
+        """
+        voice_id = self.default_voice_id if voice == "default" else voice
+        cache_key = TTSCache.key(text, voice_id, self.model_id, self.voice_settings)
+        cached = self.cache.get(cache_key)
+        if cached:
+            logger.info(f"⚡ TTS cache hit for: '{text[:50]}...'")
+            return self._stream_file(cached), "audio/mpeg"
+
+        if not self.elevenlabs_api_key:
+            logger.warning("ElevenLabs API key not found, streaming dummy audio")
+            return self._stream_fallback(text)
+
+        logger.info(f"🎤 Streaming speech for: '{text[:50]}...' with voice: {voice_id}")
+        client = get_http_client("elevenlabs")
+        request = client.build_request(
+            "POST",
+            f"{self.elevenlabs_url}/text-to-speech/{voice_id}/stream",
+            headers={"xi-api-key": self.elevenlabs_api_key},
+            json={"text": text, "model_id": self.model_id, "voice_settings": self.voice_settings},
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            logger.error(f"❌ ElevenLabs streaming request failed: {str(e)}")
+            return self._stream_fallback(text)
+
+        if response.status_code != 200:
+            await response.aread()
+            await response.aclose()
+            logger.error(f"❌ ElevenLabs API error: {response.status_code} - {response.text}")
+            return self._stream_fallback(text)
+
+        return self._stream_upstream(response, cache_key, text), "audio/mpeg"
+
+    async def _stream_upstream(self, response: httpx.Response, cache_key: str, text: str) -> AsyncIterator[bytes]:
+        try:
+            # Tee into the cache; only a complete stream is committed
+            cache_file = self.cache.open_temp()
+            complete = False
+            try:
+                async for chunk in response.aiter_bytes():
+                    cache_file.write(chunk)
+                    yield chunk
+                complete = True
+            finally:
+                cache_file.close()
+                if complete:
+                    self.cache.commit(cache_key, cache_file.name)
+                    logger.info(f"✅ Streamed and cached TTS audio for: '{text[:50]}...'")
+                else:
+                    os.remove(cache_file.name)
+        finally:
+            await response.aclose()
+
+    async def _stream_file(self, filename: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        path = f"temp/{filename}"
+        if not os.path.exists(path):
+            logger.error(f"❌ Audio file missing: {path}")
+            return
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def _stream_fallback(self, text: str) -> Tuple[AsyncIterator[bytes], str]:
+        filename = os.path.basename(self._create_dummy_audio(text))
+        media_type = "audio/wav" if filename.endswith(".wav") else "audio/mpeg"
+        return self._stream_file(filename), media_type
+
     def _create_dummy_audio(self, text: str) -> str:
         """Create a dummy audio response when API is not available"""
         logger.warning("🔄 Creating dummy audio as fallback")
         try:
-            # Create unique filename with timestamp to prevent caching
-            timestamp = int(time.time() * 1000)  # milliseconds
-            random_id = random.randint(1000, 9999)  # add randomness
-            text_hash = abs(hash(text))
-            audio_filename = f"dummy_audio_{text_hash}_{timestamp}_{random_id}.mp3"
-            audio_path = f"temp/{audio_filename}"
-            
             # Ensure temp directory exists
             os.makedirs("temp", exist_ok=True)
             
-            # Always create a new audio file (don't reuse old files)
-            if os.path.exists(audio_path):
-                os.remove(audio_path)  # Remove existing file to ensure fresh creation
-            
-            # Try to copy a placeholder audio file if it exists
+            # Serve the placeholder audio file if it exists (copied into temp/ once)
             placeholder_path = "placeholder_audio.mp3"
             if os.path.exists(placeholder_path):
-                import shutil
-                shutil.copy2(placeholder_path, audio_path)
-                logger.info(f"📁 Copied placeholder audio to: {audio_path}")
+                audio_filename = "fallback_placeholder.mp3"
+                if not os.path.exists(f"temp/{audio_filename}"):
+                    import shutil
+                    shutil.copy2(placeholder_path, f"temp/{audio_filename}")
+                    logger.info(f"📁 Copied placeholder audio to: temp/{audio_filename}")
                 return f"/audio/{audio_filename}"
             
-            # Create a simple WAV file first, then try to convert to MP3
-            wav_path = audio_path.replace('.mp3', '.wav')
-            self._create_simple_wav(wav_path, duration=max(2.0, len(text) * 0.05))
-            
-            # For now, just rename WAV to MP3 (basic compatibility)
-            try:
-                import shutil
-                shutil.move(wav_path, audio_path)
-                logger.info(f"🎵 Created dummy audio file: {audio_path}")
-            except Exception:
-                # If rename fails, serve the WAV file directly
-                logger.info(f"🎵 Created dummy WAV file: {wav_path}")
-                wav_filename = f"dummy_audio_{text_hash}_{timestamp}_{random_id}.wav"
-                return f"/audio/{wav_filename}"
+            # Tones are rendered once per fixed duration and then reused, so repeated
+            # fallbacks (e.g. during an ElevenLabs outage) are just a file reference
+            seconds = fallback_tone_seconds(text)
+            audio_filename = self._fallback_tones.get(seconds)
+            if audio_filename is None or not os.path.exists(f"temp/{audio_filename}"):
+                audio_filename = f"fallback_tone_{seconds}s.wav"
+                if not os.path.exists(f"temp/{audio_filename}"):
+                    # Render under a temporary name so a half-written tone is never reused
+                    self._create_simple_wav(f"temp/{audio_filename}.part", duration=seconds)
+                    os.replace(f"temp/{audio_filename}.part", f"temp/{audio_filename}")
+                self._fallback_tones[seconds] = audio_filename
             
             return f"/audio/{audio_filename}"
             
@@ -190,42 +271,22 @@ class TTSService:
             logger.error(f"❌ Error creating dummy audio: {str(e)}")
             return "/audio/placeholder.mp3"  # Return MP3 extension
     
-    def _cleanup_old_files(self):
-        """Clean up old audio files to prevent temp directory from getting too large"""
-        try:
-            import glob
-            current_time = time.time()
-            # Remove files older than 1 hour (3600 seconds)
-            cutoff_time = current_time - 3600
-            
-            for file_pattern in ["temp/dummy_audio_*.mp3", "temp/dummy_audio_*.wav", "temp/elevenlabs_audio_*.mp3"]:
-                for file_path in glob.glob(file_pattern):
-                    if os.path.getmtime(file_path) < cutoff_time:
-                        os.remove(file_path)
-                        logger.info(f"🧹 Cleaned up old audio file: {file_path}")
-        except Exception as e:
-            logger.warning(f"⚠️ Could not clean up old files: {str(e)}")
-    
     def _create_simple_wav(self, filename: str, duration: float = 2.0, sample_rate: int = 22050):
         """Create a simple WAV file with a tone"""
         try:
             import wave
-            import math
-            import struct
+            import numpy as np
             
-            # Generate a simple sine wave with higher volume
-            frames = []
-            for i in range(int(duration * sample_rate)):
-                # Generate a 440Hz tone (A note) with higher amplitude
-                value = int(32767 * 0.3 * math.sin(2 * math.pi * 440 * i / sample_rate))
-                frames.append(struct.pack('<h', value))
+            # 440Hz tone (A note) with higher amplitude, synthesized in one vectorized call
+            t = np.arange(int(duration * sample_rate)) / sample_rate
+            samples = (32767 * 0.3 * np.sin(2 * np.pi * 440 * t)).astype("<i2")
             
             # Write WAV file
             with wave.open(filename, 'wb') as wav_file:
                 wav_file.setnchannels(1)  # Mono
                 wav_file.setsampwidth(2)  # 16-bit
                 wav_file.setframerate(sample_rate)
-                wav_file.writeframes(b''.join(frames))
+                wav_file.writeframes(samples.tobytes())
                 
             logger.info(f"🎼 Created WAV file with {duration:.1f}s duration: {filename}")
                 
@@ -245,25 +306,25 @@ class TTSService:
             if not self.elevenlabs_api_key:
                 return []
                 
-            async with httpx.AsyncClient() as client:
-                headers = {
-                    "Accept": "application/json",
-                    "xi-api-key": self.elevenlabs_api_key
-                }
-                
-                response = await client.get(
-                    f"{self.elevenlabs_url}/voices",
-                    headers=headers
-                )
+            client = get_http_client("elevenlabs")
+            headers = {
+                "Accept": "application/json",
+                "xi-api-key": self.elevenlabs_api_key
+            }
+            
+            response = await client.get(
+                f"{self.elevenlabs_url}/voices",
+                headers=headers
+            )
+            
+            if response.status_code == 200:
+                voices = response.json()["voices"]
+                logger.info(f"✅ Retrieved {len(voices)} voices from ElevenLabs")
+                return voices
+            else:
+                logger.error(f"❌ Failed to get voices: {response.status_code}")
+                return []
                 
-                if response.status_code == 200:
-                    voices = response.json()["voices"]
-                    logger.info(f"✅ Retrieved {len(voices)} voices from ElevenLabs")
-                    return voices
-                else:
-                    logger.error(f"❌ Failed to get voices: {response.status_code}")
-                    return []
-                    
         except Exception as e:
             logger.error(f"❌ Error getting voices: {str(e)}")
             return []
@@ -0,0 +1,77 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+from services.ai_service import GroqService  # noqa: E402
+
+class FakeStream:
+    """Groq chat completion stream yielding one delta per token"""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.closed = False
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            await asyncio.sleep(0)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+    async def close(self):
+        self.closed = True
+
+class FakeCompletions:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.streams = []
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            self.streams.append(FakeStream(self.tokens))
+            return self.streams[-1]
+        reply = "".join(self.tokens)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))])
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONVERSATION_STORE_DIR", str(tmp_path))
+    service = GroqService()
+    completions = FakeCompletions(["I hear ", "you. ", "Tell me more."])
+    service.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return service
+
+def test_streamed_reply_is_recorded(service):
+    async def scenario():
+        return [token async for token in service.stream_therapy_response("hi", session_id="a")]
+
+    assert "".join(asyncio.run(scenario())) == "I hear you. Tell me more."
+    conversation = service.conversations.get("a")
+    assert [m["role"] for m in conversation.messages] == ["user", "assistant"]
+    assert conversation.messages[1]["content"] == "I hear you. Tell me more."
+    assert service.client.chat.completions.streams[0].closed
+
+def test_session_is_free_while_streaming(service):
+    async def scenario():
+        tokens = service.stream_therapy_response("hi", session_id="a")
+        assert await tokens.__anext__() == "I hear "
+        # Another request for the same session is not held up by the open stream
+        reply = await asyncio.wait_for(service.generate_therapy_response("again", session_id="a"), 1)
+        await tokens.aclose()
+        return reply
+
+    assert asyncio.run(scenario()) == "I hear you. Tell me more."
+
+def test_abandoned_stream_is_closed_and_not_recorded(service):
+    async def scenario():
+        tokens = service.stream_therapy_response("hi", session_id="a")
+        await tokens.__anext__()
+        await tokens.aclose()
+
+    asyncio.run(scenario())
+    conversation = service.conversations.get("a")
+    assert conversation.messages == []
+    assert not conversation.lock.locked()
+    assert service.client.chat.completions.streams[0].closed
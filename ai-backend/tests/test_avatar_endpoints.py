@@ -0,0 +1,27 @@
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("CONVERSATION_STORE_DIR", str(tmp_path / "sessions"))
+    monkeypatch.delenv("DID_API_KEY", raising=False)
+    import app
+
+    # Fresh services (and avatar jobs) rooted in this test's temp/
+    monkeypatch.setattr(app, "groq_service", None)
+    with TestClient(app.app) as client:
+        yield client
+
+def test_avatar_job_finishes_with_a_video_in_dev_mode(client):
+    job = client.post("/avatar", json={"text": "hello there"}).json()
+    assert job["status"] == "success" and job["job_id"]
+
+    finished = client.get(f"/avatar/jobs/{job['job_id']}", params={"wait": 5}).json()
+    assert finished["state"] == "done"
+    assert finished["video_url"].startswith("/video/")
+    assert client.get(finished["video_url"]).status_code == 200
+
+def test_unknown_avatar_job(client):
+    assert client.get("/avatar/jobs/nope").status_code == 404
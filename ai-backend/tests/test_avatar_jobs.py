@@ -0,0 +1,170 @@
+import asyncio
+import time
+
+from services.avatar_jobs import AvatarJobManager
+
+class FakeAvatarService:
+    """Stands in for AvatarService: talks finish after `polls_to_finish` status checks"""
+
+    def __init__(self, did_api_key="key", polls_to_finish=2, status="done"):
+        self.did_api_key = did_api_key
+        self.polls_to_finish = polls_to_finish
+        self.status = status
+        self.started = []
+        self.polls = {}
+
+    def presenter_id(self, avatar_id="default"):
+        return "amy" if avatar_id == "default" else avatar_id
+
+    async def start_talk(self, text, avatar_id="default", webhook_url=None):
+        talk_id = f"talk-{len(self.started)}"
+        self.started.append((text, self.presenter_id(avatar_id)))
+        return talk_id
+
+    async def get_talk(self, talk_id):
+        self.polls[talk_id] = self.polls.get(talk_id, 0) + 1
+        if self.polls[talk_id] < self.polls_to_finish:
+            return {"id": talk_id, "status": "started"}
+        if self.status == "error":
+            return {"id": talk_id, "status": "error", "error": {"description": "bad image"}}
+        return {"id": talk_id, "status": "done", "result_url": f"https://cdn/{talk_id}.mp4"}
+
+    async def create_talking_avatar(self, text, avatar_id="default"):
+        return "/video/dummy.mp4"
+
+    def _create_dummy_video(self):
+        return "/video/fallback.mp4"
+
+def manager(service, **kwargs):
+    options = {"initial_interval": 0.01, "max_interval": 0.02, "timeout": 5}
+    options.update(kwargs)
+    return AvatarJobManager(service, **options)
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+def test_identical_requests_share_one_render():
+    service = FakeAvatarService()
+
+    async def scenario():
+        jobs = manager(service)
+        first = jobs.submit("hello")
+        second = jobs.submit("hello")
+        other_presenter = jobs.submit("hello", "bob")
+        await jobs.wait(first.job_id, 2)
+        await jobs.wait(other_presenter.job_id, 2)
+        await jobs.stop()
+        return jobs, first, second, other_presenter
+
+    jobs, first, second, other_presenter = run(scenario)
+    assert second is first
+    assert other_presenter is not first
+    assert service.started == [("hello", "amy"), ("hello", "bob")]
+    assert first.state == "done" and first.video_url == "https://cdn/talk-0.mp4"
+    assert jobs.stats()["deduplicated"] == 1
+
+def test_finished_renders_are_reused():
+    service = FakeAvatarService()
+
+    async def scenario():
+        jobs = manager(service)
+        first = jobs.submit("hello")
+        await jobs.wait(first.job_id, 2)
+        again = jobs.submit("hello")
+        await jobs.stop()
+        return jobs, first, again
+
+    jobs, first, again = run(scenario)
+    assert again is not first
+    assert again.state == "done" and again.video_url == first.video_url
+    assert len(service.started) == 1
+    assert jobs.stats()["cache_hits"] == 1
+
+def test_cached_renders_expire_and_are_bounded():
+    service = FakeAvatarService(polls_to_finish=1)
+
+    async def scenario():
+        jobs = manager(service, cache_size=2, cache_ttl=60)
+        for text in ("a", "b", "c"):
+            await jobs.wait(jobs.submit(text).job_id, 2)
+        assert list(jobs.renders) == [jobs.render_key("b"), jobs.render_key("c")]
+
+        # "c" aged past the TTL: rendered again
+        key = jobs.render_key("c")
+        url, _ = jobs.renders[key]
+        jobs.renders[key] = (url, time.time() - 120)
+        await jobs.wait(jobs.submit("c").job_id, 2)
+        await jobs.stop()
+        return jobs
+
+    jobs = run(scenario)
+    assert [text for text, _ in service.started] == ["a", "b", "c", "c"]
+    assert jobs.stats()["cache_hits"] == 0
+
+def test_failed_renders_fall_back_and_are_not_cached():
+    service = FakeAvatarService(polls_to_finish=1, status="error")
+
+    async def scenario():
+        jobs = manager(service)
+        first = jobs.submit("hello")
+        await jobs.wait(first.job_id, 2)
+        retry = jobs.submit("hello")
+        await jobs.wait(retry.job_id, 2)
+        await jobs.stop()
+        return first, retry
+
+    first, retry = run(scenario)
+    assert first.state == "failed"
+    assert first.video_url == "/video/fallback.mp4"
+    assert "bad image" in first.error
+    assert retry is not first
+    assert len(service.started) == 2
+
+def test_webhook_completes_without_polling():
+    service = FakeAvatarService(polls_to_finish=1000)
+
+    async def scenario():
+        jobs = manager(service, initial_interval=60, max_interval=60)
+        job = jobs.submit("hello")
+        while job.talk_id is None:
+            await asyncio.sleep(0)
+        assert jobs.complete_talk({"id": job.talk_id, "status": "done", "result_url": "https://cdn/hook.mp4"})
+        assert not jobs.complete_talk({"id": "someone-else", "status": "done"})
+        await jobs.wait(job.job_id, 1)
+        await jobs.stop()
+        return jobs, job
+
+    jobs, job = run(scenario)
+    assert job.state == "done" and job.video_url == "https://cdn/hook.mp4"
+    assert jobs.stats()["status_checks"] == 0
+
+def test_slow_renders_time_out():
+    service = FakeAvatarService(polls_to_finish=1000)
+
+    async def scenario():
+        jobs = manager(service, timeout=0.05)
+        job = jobs.submit("hello")
+        await jobs.wait(job.job_id, 2)
+        await jobs.stop()
+        return job
+
+    job = run(scenario)
+    assert job.state == "failed" and job.error == "Video generation timed out"
+    assert job.video_url == "/video/fallback.mp4"
+
+def test_without_api_key_jobs_finish_with_the_dummy_video():
+    service = FakeAvatarService(did_api_key=None)
+
+    async def scenario():
+        jobs = manager(service)
+        job = jobs.submit("hello")
+        await jobs.wait(job.job_id, 1)
+        again = jobs.submit("hello")
+        await jobs.wait(again.job_id, 1)
+        await jobs.stop()
+        return jobs, job, again
+
+    jobs, job, again = run(scenario)
+    assert job.state == "done" and job.video_url == "/video/dummy.mp4"
+    assert again is not job
+    assert jobs.stats()["cached_renders"] == 0
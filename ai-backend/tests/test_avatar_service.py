@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from services import avatar_service as avatar_module
+from services.avatar_service import AvatarService
+
+WEBAPP_VIDEO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "WEBAPP", "public", "aiVideo.mp4"
+)
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # AvatarService prepares its fallback video under ./temp
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DID_API_KEY", raising=False)
+    return tmp_path
+
+def served_path(url: str) -> str:
+    assert url.startswith("/video/")
+    return os.path.join("temp", url[len("/video/"):])
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def test_fallback_video_is_prepared_once(workdir):
+    service = AvatarService()
+    url = service.fallback_video_url
+    path = served_path(url)
+    assert read(path) == read(WEBAPP_VIDEO)
+    inode = os.stat(path).st_ino
+
+    assert service._create_dummy_video() == url
+    assert os.stat(path).st_ino == inode
+
+def test_missing_fallback_video_is_prepared_again(workdir):
+    service = AvatarService()
+    path = served_path(service.fallback_video_url)
+    os.remove(path)
+    assert service._create_dummy_video() == service.fallback_video_url
+    assert read(path) == read(WEBAPP_VIDEO)
+
+def test_copy_when_hard_links_are_unavailable(workdir, monkeypatch):
+    def no_links(src, dst):
+        raise OSError("cross-device link")
+
+    monkeypatch.setattr(avatar_module.os, "link", no_links)
+    path = served_path(AvatarService().fallback_video_url)
+    assert read(path) == read(WEBAPP_VIDEO)
+    assert not os.path.samefile(path, WEBAPP_VIDEO)
+    assert [name for name in os.listdir("temp") if name.endswith(".tmp")] == []
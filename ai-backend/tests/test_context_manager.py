@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from services import context_manager
+from services.context_manager import MESSAGE_OVERHEAD_TOKENS, ContextWindowManager
+from services.conversation_store import Conversation
+
+@pytest.fixture(autouse=True)
+def length_based_tokens(monkeypatch):
+    # ~4 characters per token, without tiktoken's encoding download
+    monkeypatch.setattr(context_manager, "_encoding", lambda: None)
+    context_manager.count_tokens.cache_clear()
+    yield
+    context_manager.count_tokens.cache_clear()
+
+async def no_summary(prompt):
+    return ""
+
+def turns(count: int, size: int = 40):
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"{i:02d}" + "x" * (size - 2)})
+    return messages
+
+def test_prompt_keeps_the_most_recent_turns_within_budget():
+    conversation = Conversation("s", messages=turns(20), max_messages=40)
+    per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+    manager = ContextWindowManager(no_summary, max_prompt_tokens=per_message * 6)
+    messages = manager.build_messages("x" * 40, conversation, "y" * 40)
+
+    assert messages[0]["role"] == "system"
+    assert messages[-1] == {"role": "user", "content": "y" * 40}
+    history = messages[1:-1]
+    assert [m["content"][:2] for m in history] == ["16", "17", "18", "19"]
+    assert sum(context_manager.message_tokens(m) for m in messages) <= manager.max_prompt_tokens
+
+def test_window_does_not_open_on_an_assistant_reply():
+    conversation = Conversation("s", messages=turns(4), max_messages=40)
+    per_message = 10 + MESSAGE_OVERHEAD_TOKENS
+    manager = ContextWindowManager(no_summary, max_prompt_tokens=per_message * 5)
+    history = manager.build_messages("x" * 40, conversation, "y" * 40)[1:-1]
+    assert [m["content"][:2] for m in history] == ["02", "03"]
+    assert history[0]["role"] == "user"
+
+def test_summary_is_included_and_refreshed_in_the_background():
+    prompts = []
+
+    async def summarize(prompt):
+        prompts.append(prompt)
+        return "student is stressed about exams"
+
+    async def scenario():
+        conversation = Conversation("s", messages=turns(6), max_messages=4)
+        assert len(conversation.unsummarized) == 2
+        manager = ContextWindowManager(summarize)
+        manager.schedule_summary(conversation)
+        manager.schedule_summary(conversation)  # already running: not scheduled twice
+        await manager.close()
+        return manager, conversation
+
+    manager, conversation = asyncio.run(scenario())
+    assert len(prompts) == 1
+    assert conversation.summary == "student is stressed about exams"
+    assert conversation.unsummarized == []
+    assert not conversation.summarizing
+
+    messages = manager.build_messages("system", conversation, "hi")
+    assert "student is stressed about exams" in messages[1]["content"]
+
+def test_turns_added_during_a_summary_are_kept():
+    async def scenario():
+        conversation = Conversation("s", messages=turns(6), max_messages=4)
+        pending = list(conversation.unsummarized)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def summarize(prompt):
+            started.set()
+            await release.wait()
+            return "summary"
+
+        manager = ContextWindowManager(summarize)
+        manager.schedule_summary(conversation)
+        await started.wait()
+        # Six more turns overflow into the backlog, which is trimmed to
+        # max_messages and already drops what is being summarized
+        async with conversation.lock:
+            for message in turns(6):
+                conversation.append(message["role"], "new " + message["content"])
+        backlog = list(conversation.unsummarized)
+        release.set()
+        await manager.close()
+        return conversation, pending, backlog
+
+    conversation, pending, backlog = asyncio.run(scenario())
+    assert conversation.summary == "summary"
+    assert conversation.unsummarized == backlog
+    assert [m["content"][:2] for m in backlog] == ["04", "05", "ne", "ne"]
+    assert not any(m in pending for m in backlog)
+
+def test_failed_summary_keeps_the_backlog():
+    async def summarize(prompt):
+        raise RuntimeError("rate limited")
+
+    async def scenario():
+        conversation = Conversation("s", messages=turns(6), max_messages=4)
+        manager = ContextWindowManager(summarize)
+        manager.schedule_summary(conversation)
+        await manager.close()
+        return conversation
+
+    conversation = asyncio.run(scenario())
+    assert len(conversation.unsummarized) == 2
+    assert conversation.summary == ""
+    assert not conversation.summarizing
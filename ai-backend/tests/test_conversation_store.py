@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import time
+
+from services.conversation_store import ConversationStore
+
+def chat(store: ConversationStore, session_id: str, *contents: str):
+    conversation = store.get(session_id)
+    for content in contents:
+        conversation.append("user", content)
+    return conversation
+
+def stored_files(store: ConversationStore):
+    return sorted(name for name in os.listdir(store.storage_dir) if name.endswith(".json"))
+
+def test_sessions_are_isolated(tmp_path):
+    store = ConversationStore(storage_dir=str(tmp_path))
+    chat(store, "a", "hello from a")
+    chat(store, "b", "hello from b")
+    assert [m["content"] for m in store.get("a").messages] == ["hello from a"]
+    assert [m["content"] for m in store.get("b").messages] == ["hello from b"]
+
+def test_least_recently_used_session_is_evicted_and_reloaded(tmp_path):
+    store = ConversationStore(max_active_sessions=2, storage_dir=str(tmp_path))
+    first = chat(store, "a", "one", "two")
+    first.summary = "earlier talk"
+    chat(store, "b", "hi")
+    store.get("a")  # touch: "b" is now least recently used
+    chat(store, "c", "hey")
+
+    assert store.stats()["active_sessions"] == 2
+    assert len(stored_files(store)) == 1
+
+    chat(store, "b")  # reloaded from disk, evicting "a"
+    assert [m["content"] for m in store.get("b").messages] == ["hi"]
+    reloaded = store.get("a")
+    assert reloaded is not first
+    assert [m["content"] for m in reloaded.messages] == ["one", "two"]
+    assert reloaded.summary == "earlier talk"
+
+def test_overflow_moves_to_unsummarized(tmp_path):
+    store = ConversationStore(max_messages=2, storage_dir=str(tmp_path))
+    conversation = chat(store, "a", "1", "2", "3")
+    assert [m["content"] for m in conversation.messages] == ["2", "3"]
+    assert [m["content"] for m in conversation.unsummarized] == ["1"]
+
+def test_busy_sessions_are_not_evicted(tmp_path):
+    async def scenario():
+        store = ConversationStore(max_active_sessions=1, storage_dir=str(tmp_path))
+        busy = chat(store, "a", "typing")
+        async with busy.lock:
+            requested = chat(store, "b", "hi")
+            # Over capacity until "a" is free: neither session can go
+            assert stored_files(store) == []
+            assert store.get("b") is requested
+        chat(store, "c", "hey")
+        return stored_files(store), store.get("a")
+
+    files, reloaded = asyncio.run(scenario())
+    assert len(files) == 2  # "a" and "b" went to disk once "a" was released
+    assert [m["content"] for m in reloaded.messages] == ["typing"]
+
+def test_flush_and_reset(tmp_path):
+    store = ConversationStore(storage_dir=str(tmp_path))
+    chat(store, "a", "hi")
+    store.flush()
+    assert len(stored_files(store)) == 1
+
+    restarted = ConversationStore(storage_dir=str(tmp_path))
+    assert [m["content"] for m in restarted.get("a").messages] == ["hi"]
+    restarted.reset("a")
+    assert stored_files(restarted) == []
+
+def test_idle_transcripts_are_pruned(tmp_path):
+    store = ConversationStore(storage_dir=str(tmp_path), retention=3600)
+    stale = chat(store, "old", "hi")
+    chat(store, "new", "hello")
+    store.flush()
+    assert len(stored_files(store)) == 2
+
+    # Age one stored transcript past the retention period
+    path = store._path("old")
+    os.utime(path, (time.time() - 7200, time.time() - 7200))
+    assert ConversationStore(storage_dir=str(tmp_path), retention=3600).stats()["pruned_sessions"] == 1
+    assert stored_files(store) == [os.path.basename(store._path("new"))]
+
+    # Idle in-memory sessions are neither written on flush nor handed back
+    stale.last_active = time.time() - 7200
+    store.flush()
+    assert not os.path.exists(path)
+    assert store.get("old").messages == []
+
+def test_expired_transcript_is_not_reloaded(tmp_path):
+    store = ConversationStore(max_active_sessions=1, storage_dir=str(tmp_path), retention=3600)
+    chat(store, "a", "secret")
+    chat(store, "b", "hi")  # evicts "a" to disk
+
+    # Aged out while nobody pruned (e.g. prune interval not reached)
+    store.get("b").last_active = time.time()
+    path = store._path("a")
+    with open(path) as f:
+        data = json.load(f)
+    data["last_active"] = time.time() - 7200
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+    assert store.get("a").messages == []
+    assert store.stats()["pruned_sessions"] == 1
+
+def test_retention_zero_keeps_everything(tmp_path):
+    store = ConversationStore(storage_dir=str(tmp_path), retention=0)
+    chat(store, "a", "hi")
+    store.flush()
+    os.utime(store._path("a"), (0, 0))
+    assert store.prune() == 0
+    assert len(stored_files(store)) == 1
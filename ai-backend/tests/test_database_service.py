@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("motor")
+
+from services.database_service import DatabaseService, HeartbeatMonitor
+
+@pytest.fixture
+def unreachable(monkeypatch):
+    # Nothing listens here; the client is still created without blocking
+    monkeypatch.setenv("MONGODB_URL", "mongodb://127.0.0.1:1")
+    monkeypatch.setenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "50")
+    monkeypatch.setenv("MONGODB_MAX_POOL_SIZE", "7")
+
+def test_heartbeats_drive_health():
+    monitor = HeartbeatMonitor()
+    monitor.succeeded(SimpleNamespace(connection_id=("db", 27017), duration=0.0042))
+    assert monitor.healthy and monitor.round_trip_ms == 4.2
+    monitor.failed(SimpleNamespace(reply=ConnectionError("refused")))
+    assert not monitor.healthy and monitor.last_error == "refused"
+    assert monitor.last_failure >= monitor.last_success
+
+def test_one_client_for_the_app_lifetime(unreachable):
+    async def scenario():
+        service = DatabaseService()
+        await service.connect(verify=False)
+        client = service.client
+        await service.connect(verify=False)
+        assert service.client is client
+        assert await service._database() is service.db
+        assert client.options.pool_options.max_pool_size == 7
+        health = service.health()
+        await service.disconnect()
+        return service, health
+
+    service, health = asyncio.run(scenario())
+    assert health["connected"] is True and health["max_pool_size"] == 7
+    assert service.client is None and service.health()["connected"] is False
+
+def test_database_connects_lazily_outside_the_app(unreachable):
+    async def scenario():
+        service = DatabaseService()
+        db = await service._database()
+        name = db.name
+        await service.disconnect()
+        return name
+
+    assert asyncio.run(scenario()) == "ai_therapist"
+
+def test_verified_connect_reports_an_unreachable_server(unreachable):
+    from pymongo.errors import ConnectionFailure
+
+    async def scenario():
+        service = DatabaseService()
+        try:
+            with pytest.raises(ConnectionFailure):
+                await service.connect()
+        finally:
+            await service.disconnect()
+
+    asyncio.run(scenario())
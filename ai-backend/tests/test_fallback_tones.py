@@ -0,0 +1,32 @@
+import os
+import wave
+
+import pytest
+
+from services.tts_service import FALLBACK_TONE_SECONDS, TTSService, fallback_tone_seconds
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("ELEVENLABS_API_KEY", raising=False)
+    return tmp_path
+
+@pytest.mark.parametrize("length, seconds", [(0, 2), (40, 2), (41, 4), (100, 8), (300, 15), (5000, 15)])
+def test_durations_snap_to_fixed_buckets(length, seconds):
+    assert fallback_tone_seconds("x" * length) == seconds
+
+def test_tones_are_rendered_once_per_bucket(workdir):
+    service = TTSService()
+    urls = {service._create_dummy_audio("x" * length) for length in range(0, 2000, 7)}
+    assert len(urls) == len(FALLBACK_TONE_SECONDS)
+    assert sorted(os.listdir(workdir / "temp")) == sorted(f"fallback_tone_{s}s.wav" for s in FALLBACK_TONE_SECONDS)
+
+    with wave.open(str(workdir / "temp" / "fallback_tone_15s.wav")) as tone:
+        assert tone.getnframes() == 15 * tone.getframerate()
+
+def test_removed_tone_is_rendered_again(workdir):
+    service = TTSService()
+    url = service._create_dummy_audio("hello")
+    os.remove(workdir / "temp" / os.path.basename(url))
+    assert service._create_dummy_audio("hello") == url
+    assert (workdir / "temp" / os.path.basename(url)).exists()
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from services import http_clients
+
+@pytest.fixture(autouse=True)
+def no_pools(monkeypatch):
+    monkeypatch.setattr(http_clients, "_clients", {})
+
+def test_one_pool_per_upstream():
+    async def scenario():
+        http_clients.open_http_clients()
+        clients = dict(http_clients._clients)
+        assert set(clients) == set(http_clients.UPSTREAMS)
+        assert http_clients.get_http_client("did") is clients["did"]
+        assert http_clients.get_http_client("elevenlabs") is not clients["did"]
+        await http_clients.close_http_clients()
+        return clients
+
+    clients = asyncio.run(scenario())
+    assert http_clients._clients == {}
+    assert all(client.is_closed for client in clients.values())
+
+def test_closed_pool_is_recreated():
+    async def scenario():
+        client = http_clients.get_http_client("did")
+        await client.aclose()
+        replacement = http_clients.get_http_client("did")
+        await http_clients.close_http_clients()
+        return client, replacement
+
+    client, replacement = asyncio.run(scenario())
+    assert replacement is not client
+
+def test_settings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("ELEVENLABS_TIMEOUT", "5")
+    client = http_clients.get_http_client("elevenlabs")
+    assert client.timeout.read == 5.0
+    assert http_clients.get_http_client("did").timeout.read == http_clients.UPSTREAMS["did"]["timeout"]
+    asyncio.run(http_clients.close_http_clients())
+
+def test_unknown_upstream():
+    with pytest.raises(KeyError):
+        http_clients.get_http_client("nope")
@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from services import llm_client
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_client, "_client", None)
+
+def test_client_is_shared_until_closed():
+    async def scenario():
+        client = llm_client.get_llm_client()
+        assert llm_client.get_llm_client() is client
+        await llm_client.close_llm_client()
+        assert llm_client._client is None
+        replacement = llm_client.get_llm_client()
+        await llm_client.close_llm_client()
+        return client, replacement
+
+    client, replacement = asyncio.run(scenario())
+    assert replacement is not client
+
+def test_close_without_a_client_is_a_no_op():
+    asyncio.run(llm_client.close_llm_client())
+    assert llm_client._client is None
@@ -0,0 +1,111 @@
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.media_files import IMMUTABLE, REVALIDATE, MediaFiles, content_digest, media_headers, parse_range
+
+DATA = bytes(range(256)) * 4  # 1024 bytes
+
+@pytest.fixture
+def media_dir(tmp_path):
+    (tmp_path / "clip.mp3").write_bytes(DATA)
+    return tmp_path
+
+@pytest.fixture
+def client(media_dir):
+    app = FastAPI()
+    app.mount("/audio", MediaFiles(directory=str(media_dir)), name="audio")
+    return TestClient(app)
+
+def test_content_digest_names_are_immutable(tmp_path):
+    path = tmp_path / "video.tmp"
+    path.write_bytes(DATA)
+    digest = content_digest(str(path))[:32]
+    headers = media_headers(f"avatar_fallback_{digest}.mp4", os.stat(path))
+    assert headers["etag"] == f'"{digest}"'
+    assert headers["cache-control"] == IMMUTABLE
+
+def test_request_keyed_names_are_revalidated(tmp_path):
+    # tts_<digest>.mp3 is keyed by the request, so the bytes behind a name can change
+    name = "tts_" + "ab" * 32 + ".mp3"
+    path = tmp_path / name
+    path.write_bytes(DATA)
+    before = media_headers(name, os.stat(path))
+    assert before["cache-control"] == REVALIDATE
+    assert before["etag"] != '"' + "ab" * 32 + '"'
+
+    # Re-synthesis after eviction replaces the file under the same name
+    replacement = tmp_path / "new.part"
+    replacement.write_bytes(DATA[::-1])
+    os.replace(replacement, path)
+    assert media_headers(name, os.stat(path))["etag"] != before["etag"]
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=1000-", (1000, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=1024-", None),
+    ("bytes=50-10", None),
+    ("bytes=-", None),
+    ("items=0-10", None),
+    ("bytes=0-1,5-9", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(DATA)) == expected
+
+def test_full_response(client):
+    response = client.get("/audio/clip.mp3")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["cache-control"] == REVALIDATE
+
+def test_range_response(client):
+    response = client.get("/audio/clip.mp3", headers={"range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.content == DATA[100:200]
+    assert response.headers["content-range"] == "bytes 100-199/1024"
+    assert response.headers["content-length"] == "100"
+
+    suffix = client.get("/audio/clip.mp3", headers={"range": "bytes=-10"})
+    assert suffix.status_code == 206 and suffix.content == DATA[-10:]
+
+def test_unsatisfiable_range(client, media_dir):
+    response = client.get("/audio/clip.mp3", headers={"range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+    assert "cache-control" not in response.headers
+
+    # Not even for immutable, content-addressed files
+    digest = content_digest(str(media_dir / "clip.mp3"))[:32]
+    os.replace(media_dir / "clip.mp3", media_dir / f"avatar_fallback_{digest}.mp4")
+    response = client.get(f"/audio/avatar_fallback_{digest}.mp4", headers={"range": "bytes=2000-"})
+    assert response.status_code == 416
+    assert "cache-control" not in response.headers
+    assert response.headers["etag"] == f'"{digest}"'
+
+def test_multiple_ranges_get_the_whole_file(client):
+    response = client.get("/audio/clip.mp3", headers={"range": "bytes=0-1,5-9"})
+    assert response.status_code == 200 and response.content == DATA
+
+def test_if_range(client):
+    etag = client.get("/audio/clip.mp3").headers["etag"]
+    matching = client.get("/audio/clip.mp3", headers={"range": "bytes=0-9", "if-range": etag})
+    assert matching.status_code == 206
+    stale = client.get("/audio/clip.mp3", headers={"range": "bytes=0-9", "if-range": '"other"'})
+    assert stale.status_code == 200 and stale.content == DATA
+
+def test_conditional_get(client):
+    etag = client.get("/audio/clip.mp3").headers["etag"]
+    response = client.get("/audio/clip.mp3", headers={"if-none-match": etag})
+    assert response.status_code == 304
+
+def test_head_range_has_no_body(client):
+    response = client.head("/audio/clip.mp3", headers={"range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == b""
+    assert response.headers["content-length"] == "10"
@@ -0,0 +1,151 @@
+import asyncio
+
+from services.speech_pipeline import SentenceSplitter, SpeechPipeline
+
+def split(*chunks: str, min_chars: int = 12):
+    splitter = SentenceSplitter(min_chars)
+    sentences = []
+    for chunk in chunks:
+        sentences.extend(splitter.feed(chunk))
+    return sentences, splitter.flush()
+
+def test_sentences_complete_across_chunks():
+    sentences, rest = split("That sounds really hard", ". How long has it", " been going on? ", "I'm here")
+    assert sentences == ["That sounds really hard.", "How long has it been going on?"]
+    assert rest == ["I'm here"]
+
+def test_trailing_text_without_punctuation_is_flushed_once():
+    splitter = SentenceSplitter()
+    assert splitter.feed("No full stop at the end") == []
+    assert splitter.flush() == ["No full stop at the end"]
+    assert splitter.flush() == []
+
+def test_short_sentences_merge_with_the_next():
+    sentences, rest = split("Hi. Ok! That is a lot to carry. ")
+    assert sentences == ["Hi. Ok! That is a lot to carry."]
+    assert rest == []
+
+def test_abbreviations_do_not_end_a_sentence():
+    sentences, rest = split("You could talk to Dr. ", "Lee about it, e.g. after class. ", "Or ask J. Smith.")
+    assert sentences == ["You could talk to Dr. Lee about it, e.g. after class."]
+    assert rest == ["Or ask J. Smith."]
+
+def test_abbreviation_split_across_chunks():
+    sentences, _ = split("I spoke with Mrs", ". Patel today. ", "She listened. ")
+    assert sentences == ["I spoke with Mrs. Patel today.", "She listened."]
+
+def test_closing_quotes_stay_with_their_sentence():
+    sentences, _ = split('She said "you will be fine." Then she left. ')
+    assert sentences == ['She said "you will be fine."', "Then she left."]
+
+class Tokens:
+    """Async token stream that records whether it was closed"""
+
+    def __init__(self, tokens, fail_after=None, stall=False):
+        self.closed = False
+
+        async def generate():
+            try:
+                for i, token in enumerate(tokens):
+                    if fail_after is not None and i == fail_after:
+                        raise RuntimeError("stream broke")
+                    await asyncio.sleep(0)
+                    yield token
+                if stall:
+                    await asyncio.Event().wait()
+            finally:
+                self.closed = True
+
+        self.stream = generate()
+
+REPLY = ["First sentence is long. ", "Second sentence is long. ", "Third one here."]
+
+async def collect(pipeline, tokens, **kwargs):
+    return [event async for event in pipeline.run(tokens.stream, **kwargs)]
+
+def test_audio_is_emitted_in_sentence_order():
+    # Later sentences finish synthesis first
+    delays = {"First sentence is long.": 0.05, "Second sentence is long.": 0.02, "Third one here.": 0.0}
+
+    async def speak(sentence):
+        await asyncio.sleep(delays[sentence])
+        return f"/audio/{sentence[:5]}.wav"
+
+    async def finalize(reply):
+        return {"video_url": "/video/reply.mp4"}
+
+    tokens = Tokens(REPLY)
+    events = asyncio.run(collect(SpeechPipeline(speak), tokens, finalize=finalize))
+
+    assert "".join(e["token"] for e in events if e["event"] == "token") == "".join(REPLY)
+    audio = [e for e in events if e["event"] == "audio"]
+    assert [e["index"] for e in audio] == [0, 1, 2]
+    assert [e["text"] for e in audio] == [s.strip() for s in REPLY]
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["audio_urls"] == [e["audio_url"] for e in audio]
+    assert done["video_url"] == "/video/reply.mp4"
+    assert tokens.closed
+
+def test_failed_sentence_keeps_its_slot():
+    async def speak(sentence):
+        if sentence.startswith("Second"):
+            raise RuntimeError("tts down")
+        return "/audio/ok.wav"
+
+    tokens = Tokens(REPLY)
+    events = asyncio.run(collect(SpeechPipeline(speak), tokens))
+    assert events[-1]["audio_urls"] == ["/audio/ok.wav", None, "/audio/ok.wav"]
+    assert tokens.closed
+
+def test_token_stream_error_is_reported():
+    async def speak(sentence):
+        return "/audio/ok.wav"
+
+    tokens = Tokens(REPLY, fail_after=1)
+    events = asyncio.run(collect(SpeechPipeline(speak), tokens))
+    assert [e["event"] for e in events] == ["token", "audio", "error"]
+    assert events[-1]["detail"] == "stream broke"
+    assert tokens.closed
+
+def test_consumer_leaving_closes_the_token_stream():
+    cancelled = []
+
+    async def speak(sentence):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(sentence)
+            raise
+
+    async def scenario():
+        tokens = Tokens(REPLY, stall=True)
+        events = SpeechPipeline(speak).run(tokens.stream)
+        async for event in events:
+            if event["event"] == "token" and event["token"] == REPLY[-1]:
+                break
+        await events.aclose()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return tokens
+
+    tokens = asyncio.run(scenario())
+    assert tokens.closed
+    assert cancelled
+
+def test_synthesis_concurrency_is_bounded():
+    running = 0
+    peak = 0
+
+    async def speak(sentence):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "/audio/ok.wav"
+
+    reply = [f"Sentence number {i} is here. " for i in range(6)]
+    events = asyncio.run(collect(SpeechPipeline(speak, max_concurrency=2), Tokens(reply)))
+    assert len(events[-1]["audio_urls"]) == 6
+    assert peak == 2
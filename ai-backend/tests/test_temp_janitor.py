@@ -0,0 +1,31 @@
+import os
+import time
+
+from services.temp_janitor import TempJanitor
+
+def write(directory, name: str, size: int, age: float = 0.0):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age:
+        os.utime(path, (time.time() - age, time.time() - age))
+    return path
+
+def test_only_partial_files_are_owned(tmp_path):
+    janitor = TempJanitor(str(tmp_path))
+    assert janitor.owns("tts_abc.mp3.part")
+    assert janitor.owns("avatar_fallback_video.tmp")
+    assert not janitor.owns("tts_abc.mp3")
+    assert not janitor.owns("fallback_tone_2s.wav")
+    assert not janitor.owns("avatar_fallback_" + "a" * 32 + ".mp4")
+
+def test_stale_partial_files_are_removed(tmp_path):
+    janitor = TempJanitor(str(tmp_path), max_age=60)
+    stale = write(tmp_path, "tts_old.part", 10, age=120)
+    writing = write(tmp_path, "tts_new.part", 10)
+    finished = write(tmp_path, "tts_abc.mp3", 10, age=120)
+    janitor.sweep()
+    assert not os.path.exists(stale)
+    assert os.path.exists(writing) and os.path.exists(finished)
+    stats = janitor.stats()
+    assert (stats["evicted_files"], stats["reclaimed_bytes"], stats["sweeps"]) == (1, 10, 1)
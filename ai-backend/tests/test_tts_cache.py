@@ -0,0 +1,47 @@
+import os
+
+from services.tts_cache import TTSCache
+
+SETTINGS = {"stability": 0.5, "similarity_boost": 0.5}
+
+def test_key_covers_everything_that_changes_the_audio():
+    key = TTSCache.key("hello", "voice", "model", SETTINGS)
+    assert key == TTSCache.key("hello", "voice", "model", dict(reversed(list(SETTINGS.items()))))
+    assert key != TTSCache.key("hello!", "voice", "model", SETTINGS)
+    assert key != TTSCache.key("hello", "other", "model", SETTINGS)
+    assert key != TTSCache.key("hello", "voice", "other", SETTINGS)
+    assert key != TTSCache.key("hello", "voice", "model", {**SETTINGS, "stability": 0.9})
+
+def test_put_and_get(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    key = TTSCache.key("hello", "voice", "model", SETTINGS)
+    assert cache.get(key) is None
+    name = cache.put(key, b"audio")
+    assert cache.get(key) == name
+    assert (tmp_path / name).read_bytes() == b"audio"
+    assert [n for n in os.listdir(tmp_path) if n.endswith(".part")] == []
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes"]) == (1, 1, 5)
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = TTSCache(str(tmp_path), max_bytes=25)
+    a, b, c = (cache.put(key, b"x" * 10) for key in ("a", "b", "c"))
+    assert cache.get("a") is None  # evicted to stay under 25 bytes
+    assert not (tmp_path / a).exists()
+
+    cache.get("b")  # touch: "c" is now least recently used
+    cache.put("d", b"x" * 10)
+    assert cache.get("b") == b and cache.get("c") is None
+    assert cache.stats()["evictions"] == 2
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    TTSCache(str(tmp_path)).put("a", b"audio")
+    reopened = TTSCache(str(tmp_path))
+    assert reopened.get("a") == reopened.filename("a")
+    assert reopened.stats()["bytes"] == 5
+
+def test_files_removed_behind_its_back_are_misses(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    os.remove(tmp_path / cache.put("a", b"audio"))
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
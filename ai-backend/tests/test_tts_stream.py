@@ -0,0 +1,70 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import tts_service as tts_module
+from services.tts_service import TTSService
+
+MP3 = b"ID3" + bytes(range(256)) * 64
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # TTSService writes to ./temp and looks for ./placeholder_audio.mp3
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("ELEVENLABS_API_KEY", raising=False)
+    return tmp_path
+
+def upstream(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(tts_module, "get_http_client", lambda name: client)
+
+async def collect(service: TTSService, text: str):
+    chunks, media_type = await service.open_speech_stream(text)
+    return b"".join([chunk async for chunk in chunks]), media_type
+
+def test_fallback_tone_is_labelled_wav(workdir):
+    body, media_type = asyncio.run(collect(TTSService(), "hello there"))
+    assert media_type == "audio/wav"
+    assert body.startswith(b"RIFF")
+
+def test_placeholder_fallback_is_labelled_mpeg(workdir):
+    (workdir / "placeholder_audio.mp3").write_bytes(MP3)
+    body, media_type = asyncio.run(collect(TTSService(), "hello there"))
+    assert (body, media_type) == (MP3, "audio/mpeg")
+
+def test_upstream_audio_is_streamed_and_cached(workdir, monkeypatch):
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, content=MP3)
+
+    upstream(monkeypatch, handler)
+    service = TTSService()
+    assert asyncio.run(collect(service, "hi")) == (MP3, "audio/mpeg")
+    assert asyncio.run(collect(service, "hi")) == (MP3, "audio/mpeg")
+    assert len(calls) == 1
+    assert service.cache.stats()["hits"] == 1
+
+def test_upstream_error_falls_back_before_headers(workdir, monkeypatch):
+    monkeypatch.setenv("ELEVENLABS_API_KEY", "key")
+    upstream(monkeypatch, lambda request: httpx.Response(401, json={"detail": "bad key"}))
+    body, media_type = asyncio.run(collect(TTSService(), "hi"))
+    assert media_type == "audio/wav"
+    assert body.startswith(b"RIFF")
+
+def test_endpoint_content_type_matches_body(workdir, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("CONVERSATION_STORE_DIR", str(workdir / "sessions"))
+    import app
+
+    monkeypatch.setattr(app, "tts_service", TTSService())
+    with TestClient(app.app) as client:
+        response = client.get("/tts/stream", params={"text": "hello"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.content.startswith(b"RIFF")
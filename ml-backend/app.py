@@ -1,20 +1,61 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import numpy as np
-import cv2
-import base64
-from io import BytesIO
-from PIL import Image
 import uvicorn
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
+import asyncio
 import json
+import uuid
 import logging
+import os
+from datetime import datetime
+
+from services.emotion_detector import RawFrame, create_detector
+from services.frame_stream import DropOldestQueue
+from services.inference_pool import InferencePool, analyze_frames
+from services.micro_batcher import MicroBatcher
+from services.session_state import SessionStore
+from services.text_classifier import TextRiskClassifier
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upper bound on frames accepted by /detect_emotion_batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "32"))
+
+# Encoded image bodies accepted by /detect_emotion_raw
+RAW_IMAGE_CONTENT_TYPES = {"image/jpeg", "image/webp", "image/png"}
+
+# Frames buffered per /ws/emotion connection before the oldest is dropped
+STREAM_MAX_PENDING = int(os.getenv("STREAM_MAX_PENDING", "1"))
+
+# Detect and crop the face before classification; frames without a face skip the model
+ENABLE_FACE_DETECTION = os.getenv("ENABLE_FACE_DETECTION", "true").lower() == "true"
+
+# Perceptual-hash result cache per inference worker (0 disables)
+FRAME_CACHE_SIZE = int(os.getenv("FRAME_CACHE_SIZE", "1024"))
+FRAME_CACHE_TTL = float(os.getenv("FRAME_CACHE_TTL", "30"))
+
+# Per-session temporal smoothing and frame skipping
+SESSION_EMA_ALPHA = float(os.getenv("SESSION_EMA_ALPHA", "0.3"))
+FRAME_DIFF_THRESHOLD = float(os.getenv("FRAME_DIFF_THRESHOLD", "0.01"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "300"))
+
+# Chat-message risk classifier (built with train_text_classifier.py)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEXT_CLASSIFIER_PATH = os.getenv("TEXT_CLASSIFIER_PATH", os.path.join(BASE_DIR, "models", "text_classifier.npz"))
+
+# Server-side micro-batching of concurrent /detect_emotion calls
+ENABLE_MICRO_BATCHING = os.getenv("ENABLE_MICRO_BATCHING", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "8"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+# Where decode/inference runs: "process" (all cores), "thread" or "inline"
+INFERENCE_EXECUTION_MODE = os.getenv("INFERENCE_EXECUTION_MODE", "process")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+
 app = FastAPI(
     title="Emotion Detection API",
     description="Real-time emotion detection from video frames",
@@ -34,67 +75,141 @@ app.add_middleware(
 class EmotionRequest(BaseModel):
     image: str  # base64 encoded image
     confidence_threshold: Optional[float] = 0.4
+    session_id: Optional[str] = None  # enables temporal smoothing and frame skipping
 
 class EmotionResponse(BaseModel):
     emotion: str
     confidence: float
     emotions: Dict[str, float]
     timestamp: str
+    face_detected: bool = True
+    frame_skipped: bool = False
+
+class EmotionBatchRequest(BaseModel):
+    images: List[str]  # base64 encoded images
+    confidence_threshold: Optional[float] = 0.4
+
+class EmotionBatchResponse(BaseModel):
+    results: List[EmotionResponse]
+    count: int
+
+class TextClassificationRequest(BaseModel):
+    text: str
+
+class TextClassificationBatchRequest(BaseModel):
+    texts: List[str]
+
+class TextClassificationResponse(BaseModel):
+    level: str
+    confidence: float
+    scores: Dict[str, float]
+    timestamp: str
+
+class TextClassificationBatchResponse(BaseModel):
+    results: List[TextClassificationResponse]
+    count: int
 
 class HealthResponse(BaseModel):
     status: str
     message: str
 
-# Mock emotion detection (replace with actual ML model)
-class EmotionDetector:
-    def __init__(self):
-        self.emotions = [
-            "happy", "sad", "angry", "surprised", 
-            "fear", "disgust", "neutral"
-        ]
-    
-    def detect_emotion(self, image_array: np.ndarray) -> Dict[str, float]:
-        """
-        Mock emotion detection - replace with actual model inference
-        """
-        # For now, return random but realistic emotion scores
-        import random
-        
-        # Generate random scores that sum to 1.0
-        scores = [random.random() for _ in self.emotions]
-        total = sum(scores)
-        normalized_scores = {
-            emotion: score / total 
-            for emotion, score in zip(self.emotions, scores)
-        }
-        
-        return normalized_scores
+# Detector metadata (inference itself runs through inference_pool)
+detector = create_detector()
+
+# Decode/inference executor; model is loaded once per worker
+inference_pool = InferencePool(
+    mode=INFERENCE_EXECUTION_MODE,
+    max_workers=INFERENCE_WORKERS,
+    face_detection=ENABLE_FACE_DETECTION,
+    cache_size=FRAME_CACHE_SIZE,
+    cache_ttl=FRAME_CACHE_TTL,
+)
+
+def build_emotion_response(result: Dict, confidence_threshold: Optional[float]) -> EmotionResponse:
+    """Pick the dominant emotion from a worker result and wrap it in an EmotionResponse"""
+    if not result.get("face_detected", True):
+        return EmotionResponse(
+            emotion="no_face",
+            confidence=0.0,
+            emotions={},
+            timestamp=datetime.now().isoformat(),
+            face_detected=False,
+            frame_skipped=result.get("skipped", False)
+        )
+
+    emotion_scores = result["emotions"]
+    # Find the dominant emotion
+    dominant_emotion = max(emotion_scores.items(), key=lambda x: x[1])
 
-# Initialize detector
-detector = EmotionDetector()
+    # Check confidence threshold
+    if confidence_threshold is not None and dominant_emotion[1] < confidence_threshold:
+        dominant_emotion = ("neutral", emotion_scores.get("neutral", 0.5))
 
-def decode_base64_image(base64_string: str) -> np.ndarray:
-    """Decode base64 image string to numpy array"""
+    return EmotionResponse(
+        emotion=dominant_emotion[0],
+        confidence=dominant_emotion[1],
+        emotions=emotion_scores,
+        timestamp=datetime.now().isoformat(),
+        frame_skipped=result.get("skipped", False)
+    )
+
+# Loaded in startup()
+text_classifier: Optional[TextRiskClassifier] = None
+
+def load_text_classifier() -> Optional[TextRiskClassifier]:
+    """Load the serialized text classifier (None, and 503s from /classify_text, if it hasn't been trained)"""
+    if not os.path.exists(TEXT_CLASSIFIER_PATH):
+        logger.warning(
+            f"Text classifier not found at {TEXT_CLASSIFIER_PATH}; "
+            f"run `python train_text_classifier.py` to build it"
+        )
+        return None
     try:
-        # Remove data URL prefix if present
-        if base64_string.startswith('data:image'):
-            base64_string = base64_string.split(',')[1]
-        
-        # Decode base64
-        image_data = base64.b64decode(base64_string)
-        image = Image.open(BytesIO(image_data))
-        
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Convert to numpy array
-        image_array = np.array(image)
-        
-        return image_array
+        model = TextRiskClassifier.load(TEXT_CLASSIFIER_PATH)
+        logger.info(f"Loaded text classifier from {TEXT_CLASSIFIER_PATH}")
+        return model
     except Exception as e:
-        logger.error(f"Error decoding image: {str(e)}")
-        raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+        logger.error(f"Text classifier unavailable: {str(e)}")
+        return None
+
+def build_text_response(scores: Dict[str, float]) -> TextClassificationResponse:
+    level, confidence = max(scores.items(), key=lambda x: x[1])
+    return TextClassificationResponse(
+        level=level,
+        confidence=confidence,
+        scores=scores,
+        timestamp=datetime.now().isoformat()
+    )
+
+# Per-session EMA and last-scored-frame thumbnails
+sessions = SessionStore(alpha=SESSION_EMA_ALPHA, max_sessions=MAX_SESSIONS, idle_ttl=SESSION_IDLE_TTL)
+
+# Coalesces concurrent single-frame requests into one worker call per batch
+micro_batcher = MicroBatcher(
+    lambda jobs: inference_pool.run(
+        analyze_frames,
+        [image for image, _ in jobs],
+        [reference for _, reference in jobs],
+        FRAME_DIFF_THRESHOLD,
+    ),
+    max_batch_size=MICRO_BATCH_MAX_SIZE,
+    max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+    # One batch per pool worker; inline mode scores on the event loop anyway
+    max_concurrency=inference_pool.max_workers,
+)
+
+@app.on_event("startup")
+async def startup():
+    global text_classifier
+    text_classifier = load_text_classifier()
+    inference_pool.start()
+    if ENABLE_MICRO_BATCHING:
+        await micro_batcher.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await micro_batcher.stop()
+    inference_pool.shutdown()
 
 @app.get("/", response_model=HealthResponse)
 async def root():
@@ -112,42 +227,194 @@ async def health():
         message="ML Backend is operational"
     )
 
+async def analyze_frame(image: Union[str, bytes, RawFrame], session_id: Optional[str] = None) -> Dict:
+    """
+    Decode and score one frame off the event loop (micro-batched when enabled).
+
+    With a session_id the result is smoothed against the session's history,
+    and frames that barely differ from the last scored one skip inference.
+    """
+    session = sessions.get(session_id) if session_id else None
+    reference = session.thumbnail if session is not None else None
+
+    if micro_batcher.running:
+        result = await micro_batcher.submit((image, reference))
+    else:
+        result = (await inference_pool.run(analyze_frames, [image], [reference], FRAME_DIFF_THRESHOLD))[0]
+        if isinstance(result, Exception):
+            raise result
+
+    inference_pool.record_cache_lookups([result])
+    if session is not None:
+        return session.update(result)
+    result.pop("thumbnail", None)
+    return result
+
 @app.post("/detect_emotion", response_model=EmotionResponse)
 async def detect_emotion(request: EmotionRequest):
     """
     Detect emotions from a base64 encoded image
     """
     try:
-        # Decode the image
-        image_array = decode_base64_image(request.image)
-        logger.info(f"Processing image with shape: {image_array.shape}")
-        
-        # Detect emotions
-        emotion_scores = detector.detect_emotion(image_array)
+        # Decode and detect (coalesced with concurrent requests when batching is on)
+        result = await analyze_frame(request.image, request.session_id)
+        logger.info(f"Processed image with shape: {tuple(result['shape'])}")
         
-        # Find the dominant emotion
-        dominant_emotion = max(emotion_scores.items(), key=lambda x: x[1])
+        return build_emotion_response(result, request.confidence_threshold)
         
-        # Check confidence threshold
-        if dominant_emotion[1] < request.confidence_threshold:
-            dominant_emotion = ("neutral", emotion_scores.get("neutral", 0.5))
-        
-        # Get current timestamp
-        from datetime import datetime
-        timestamp = datetime.now().isoformat()
-        
-        return EmotionResponse(
-            emotion=dominant_emotion[0],
-            confidence=dominant_emotion[1],
-            emotions=emotion_scores,
-            timestamp=timestamp
+    except ValueError as e:
+        logger.error(f"Error decoding image: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in emotion detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Emotion detection failed: {str(e)}")
+
+@app.post("/detect_emotion_raw", response_model=EmotionResponse)
+async def detect_emotion_raw(
+    request: Request,
+    confidence_threshold: Optional[float] = 0.4,
+    session_id: Optional[str] = None,
+):
+    """
+    Detect emotions from a binary frame body (no base64/JSON wrapping).
+
+    Accepts an encoded image (image/jpeg, image/webp, image/png) or raw RGB
+    bytes as application/octet-stream with X-Frame-Width/X-Frame-Height headers.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body = await request.body()
+    if not body:
+        raise HTTPException(status_code=400, detail="Empty request body")
+
+    if content_type in RAW_IMAGE_CONTENT_TYPES:
+        frame = body
+    elif content_type == "application/octet-stream":
+        try:
+            frame = RawFrame(
+                data=body,
+                height=int(request.headers["x-frame-height"]),
+                width=int(request.headers["x-frame-width"]),
+            )
+        except (KeyError, ValueError):
+            raise HTTPException(
+                status_code=400,
+                detail="Raw RGB frames require integer X-Frame-Width and X-Frame-Height headers"
+            )
+    else:
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type or 'none'}")
+
+    try:
+        result = await analyze_frame(frame, session_id or request.headers.get("x-session-id"))
+        return build_emotion_response(result, confidence_threshold)
+
+    except ValueError as e:
+        logger.error(f"Error decoding raw frame: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in raw emotion detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Emotion detection failed: {str(e)}")
+
+# Live /ws/emotion connection counters
+stream_stats = {"active_streams": 0, "frames_received": 0, "frames_dropped": 0, "frames_processed": 0}
+
+@app.websocket("/ws/emotion")
+async def emotion_stream(
+    websocket: WebSocket,
+    confidence_threshold: Optional[float] = 0.4,
+    session_id: Optional[str] = None,
+):
+    """
+    Stream frames over one WebSocket and receive an EmotionResponse per processed frame.
+
+    Binary messages are encoded images (JPEG/WebP/PNG); text messages are JSON
+    `{"image": "<base64>"}`. Frames arriving while inference is busy replace the
+    oldest pending frame, so slow inference never builds a backlog. Each
+    connection is a session (smoothed, with unchanged frames skipped).
+    """
+    await websocket.accept()
+    owns_session = session_id is None
+    session_id = session_id or f"ws-{uuid.uuid4().hex}"
+    pending = DropOldestQueue(STREAM_MAX_PENDING)
+    stream_stats["active_streams"] += 1
+
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    frame = message["bytes"]
+                else:
+                    try:
+                        frame = json.loads(message.get("text") or "")["image"]
+                    except (ValueError, KeyError, TypeError):
+                        await websocket.send_json({"error": "Expected binary frame or JSON {\"image\": ...}"})
+                        continue
+                stream_stats["frames_received"] += 1
+                dropped_before = pending.dropped
+                pending.put(frame)
+                stream_stats["frames_dropped"] += pending.dropped - dropped_before
+        finally:
+            pending.close()
+
+    receiver = asyncio.create_task(receive_frames())
+    try:
+        while True:
+            frame = await pending.get()
+            if frame is None:
+                break
+            try:
+                result = await analyze_frame(frame, session_id)
+                response = build_emotion_response(result, confidence_threshold)
+                stream_stats["frames_processed"] += 1
+                await websocket.send_text(response.model_dump_json())
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in emotion stream: {str(e)}")
+    finally:
+        receiver.cancel()
+        if owns_session:
+            sessions.discard(session_id)
+        stream_stats["active_streams"] -= 1
+        logger.info(
+            f"Emotion stream closed: {pending.received} frames received, {pending.dropped} dropped"
         )
-        
+
+@app.post("/detect_emotion_batch", response_model=EmotionBatchResponse)
+async def detect_emotion_batch(request: EmotionBatchRequest):
+    """
+    Detect emotions for several base64 encoded frames in one vectorized pass
+    """
+    if not request.images:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(request.images) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.images)} frames (max {MAX_BATCH_SIZE})"
+        )
+
+    try:
+        # Decode every frame and score the stacked batch in one worker call
+        batch_results = await inference_pool.run(analyze_frames, request.images)
+        logger.info(f"Processed batch of {len(batch_results)} frames")
+        inference_pool.record_cache_lookups(batch_results)
+
+        results = []
+        for i, result in enumerate(batch_results):
+            if isinstance(result, Exception):
+                raise HTTPException(status_code=400, detail=f"Frame {i}: {str(result)}")
+            results.append(build_emotion_response(result, request.confidence_threshold))
+        return EmotionBatchResponse(results=results, count=len(results))
+
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in emotion detection: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Emotion detection failed: {str(e)}")
+        logger.error(f"Error in batch emotion detection: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch emotion detection failed: {str(e)}")
 
 @app.post("/detect_emotion_file")
 async def detect_emotion_from_file(file: UploadFile = File(...)):
@@ -158,34 +425,69 @@ async def detect_emotion_from_file(file: UploadFile = File(...)):
         # Read file
         contents = await file.read()
         
-        # Convert to PIL Image
-        image = Image.open(BytesIO(contents))
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        # Decode and detect emotions
+        result = await analyze_frame(contents)
         
-        image_array = np.array(image)
-        
-        # Detect emotions
-        emotion_scores = detector.detect_emotion(image_array)
-        
-        # Find the dominant emotion
-        dominant_emotion = max(emotion_scores.items(), key=lambda x: x[1])
-        
-        # Get current timestamp
-        from datetime import datetime
-        timestamp = datetime.now().isoformat()
-        
-        return EmotionResponse(
-            emotion=dominant_emotion[0],
-            confidence=dominant_emotion[1],
-            emotions=emotion_scores,
-            timestamp=timestamp
-        )
+        # No threshold here: always report the dominant emotion
+        return build_emotion_response(result, None)
         
+    except ValueError as e:
+        logger.error(f"Error decoding uploaded file: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing uploaded file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"File processing failed: {str(e)}")
 
+@app.get("/stats/batching")
+async def get_batching_stats():
+    """Micro-batching queue depth and batch size histograms"""
+    return micro_batcher.stats()
+
+@app.get("/stats/streams")
+async def get_stream_stats():
+    """WebSocket streaming connection and frame counters"""
+    return stream_stats
+
+@app.post("/classify_text", response_model=TextClassificationResponse)
+async def classify_text(request: TextClassificationRequest):
+    """
+    Triage a chat message into a mental-health risk level (Critical/Moderate/Healthy)
+    """
+    if text_classifier is None:
+        raise HTTPException(status_code=503, detail="Text classifier is not loaded")
+    return build_text_response(text_classifier.predict_proba(request.text))
+
+@app.post("/classify_text_batch", response_model=TextClassificationBatchResponse)
+async def classify_text_batch(request: TextClassificationBatchRequest):
+    """
+    Triage several chat messages in one request
+    """
+    if text_classifier is None:
+        raise HTTPException(status_code=503, detail="Text classifier is not loaded")
+    if len(request.texts) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.texts)} texts (max {MAX_BATCH_SIZE})"
+        )
+
+    results = [build_text_response(scores) for scores in text_classifier.predict_batch(request.texts)]
+    return TextClassificationBatchResponse(results=results, count=len(results))
+
+@app.get("/stats/cache")
+async def get_cache_stats():
+    """Perceptual-hash frame cache hit/miss counters"""
+    return inference_pool.cache_stats()
+
+@app.get("/stats/sessions")
+async def get_session_stats():
+    """Active sessions and how many frames skipped inference"""
+    return sessions.stats()
+
+@app.get("/stats/workers")
+async def get_worker_stats():
+    """Inference worker pool configuration"""
+    return inference_pool.stats()
+
 @app.get("/emotions")
 async def get_available_emotions():
     """Get list of available emotions"""
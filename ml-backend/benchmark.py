@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Benchmark the configured emotion model on CPU and report frames/sec per core.
+
+Usage:
+    EMOTION_BACKEND=onnx ONNX_INTRA_OP_THREADS=1 python benchmark.py --batch-sizes 1 8 32
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from services.emotion_detector import create_detector
+
+def benchmark(detector, batch_size: int, seconds: float, warmup: int = 3) -> float:
+    """Run detect_batch repeatedly for `seconds` and return frames per second"""
+    width, height = detector.input_size
+    frames = np.random.randint(0, 256, (batch_size, height, width, 3), dtype=np.uint8)
+
+    for _ in range(warmup):
+        detector.detect_batch(frames)
+
+    processed = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        detector.detect_batch(frames)
+        processed += batch_size
+    return processed / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion model CPU benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    detector = create_detector()
+    cores = getattr(detector, "intra_op_threads", 1)
+
+    print(f"🧪 Benchmarking {type(detector).__name__} (input {detector.input_size}, {cores} core(s))")
+    print(f"{'batch':>6} {'frames/s':>12} {'frames/s/core':>14} {'ms/frame':>10}")
+    for batch_size in args.batch_sizes:
+        fps = benchmark(detector, batch_size, args.seconds)
+        print(f"{batch_size:>6} {fps:>12.1f} {fps / cores:>14.1f} {1000.0 / fps:>10.3f}")
+
+if __name__ == "__main__":
+    os.environ.setdefault("EMOTION_BACKEND", "auto")
+    main()
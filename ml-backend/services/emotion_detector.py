@@ -0,0 +1,162 @@
+import base64
+import logging
+import os
+from io import BytesIO
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+# Mock emotion detection (replace with actual ML model)
+class EmotionDetector:
+    def __init__(self):
+        self.emotions = [
+            "happy", "sad", "angry", "surprised", 
+            "fear", "disgust", "neutral"
+        ]
+        # (width, height) the face crop is resized to before classification
+        self.input_size = (48, 48)
+    
+    def detect_emotion(self, image_array: np.ndarray) -> Dict[str, float]:
+        """
+        Mock emotion detection - replace with actual model inference
+        """
+        return self.detect_batch(image_array[np.newaxis])[0]
+
+    def detect_batch(self, frames: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Score a stacked batch of frames (N, H, W, 3) in a single vectorized pass
+        """
+        if frames.ndim != 4:
+            raise ValueError(f"Expected frames of shape (N, H, W, 3), got {frames.shape}")
+
+        # For now, return random but realistic emotion scores
+        scores = np.random.random((frames.shape[0], len(self.emotions)))
+        scores /= scores.sum(axis=1, keepdims=True)
+
+        return [
+            dict(zip(self.emotions, row.tolist()))
+            for row in scores
+        ]
+
+def create_detector():
+    """
+    Build the emotion model selected by EMOTION_BACKEND.
+
+    "onnx" loads ONNX_MODEL_PATH with onnxruntime, "mock" returns random
+    scores, and "auto" (the default) uses ONNX when the model file and
+    onnxruntime are available and falls back to the mock otherwise.
+    """
+    backend = os.getenv("EMOTION_BACKEND", "auto").lower()
+    model_path = os.getenv("ONNX_MODEL_PATH", os.path.join(MODELS_DIR, "emotion.onnx"))
+
+    if backend == "mock":
+        return EmotionDetector()
+
+    try:
+        from services.onnx_detector import OnnxEmotionDetector, parse_input_size
+        return OnnxEmotionDetector(
+            model_path,
+            intra_op_threads=int(os.getenv("ONNX_INTRA_OP_THREADS", "1")),
+            inter_op_threads=int(os.getenv("ONNX_INTER_OP_THREADS", "1")),
+            input_size=parse_input_size(os.getenv("ONNX_INPUT_SIZE")),
+        )
+    except (RuntimeError, FileNotFoundError, ValueError) as e:
+        if backend == "onnx":
+            raise
+        logger.warning(f"ONNX emotion model unavailable ({str(e)}), using mock detector")
+        return EmotionDetector()
+
+class RawFrame(NamedTuple):
+    """Uncompressed RGB frame bytes with their shape (application/octet-stream bodies)"""
+    data: bytes
+    height: int
+    width: int
+
+def decode_frame(data: Union[str, bytes, RawFrame]) -> Tuple[np.ndarray, bool]:
+    """
+    Decode a frame payload to a uint8 (H, W, 3) array.
+
+    Returns the array and whether it is in BGR channel order. Encoded bytes
+    go straight through cv2.imdecode and stay BGR; the RGB conversion is
+    folded into stack_frames so no intermediate RGB copy is made.
+    """
+    if isinstance(data, RawFrame):
+        expected = data.height * data.width * 3
+        if data.height <= 0 or data.width <= 0 or len(data.data) != expected:
+            raise ValueError(
+                f"Invalid image data: expected {expected} bytes for "
+                f"{data.width}x{data.height} RGB, got {len(data.data)}"
+            )
+        # Zero-copy view over the request body
+        return np.frombuffer(data.data, dtype=np.uint8).reshape(data.height, data.width, 3), False
+
+    if isinstance(data, bytes):
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is not None:
+            return image, True
+        # Formats OpenCV can't read fall back to PIL
+
+    return decode_image(data), False
+
+def decode_image(data: Union[str, bytes]) -> np.ndarray:
+    """Decode a base64 string or raw encoded image bytes to an RGB numpy array"""
+    try:
+        if isinstance(data, str):
+            # Remove data URL prefix if present
+            if data.startswith('data:image'):
+                data = data.split(',')[1]
+            
+            # Decode base64
+            data = base64.b64decode(data)
+
+        image = Image.open(BytesIO(data))
+        
+        # Convert to RGB if needed
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        # Convert to numpy array
+        return np.array(image)
+    except Exception as e:
+        raise ValueError(f"Invalid image data: {str(e)}") from e
+
+def stack_frames(
+    images: List[np.ndarray],
+    bgr: Optional[List[bool]] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Stack decoded frames into one (N, H, W, 3) RGB tensor, resizing to the first frame's size.
+
+    `bgr` flags frames that still need channel swapping; the swap writes
+    directly into the output slot. `out` is an optional reusable buffer.
+    """
+    height, width = images[0].shape[:2]
+    shape = (len(images), height, width, 3)
+    frames = out if out is not None and out.shape == shape else np.empty(shape, dtype=np.uint8)
+    for i, image in enumerate(images):
+        if image.shape[:2] != (height, width):
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        if bgr is not None and bgr[i]:
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=frames[i])
+        else:
+            frames[i] = image
+    return frames
+
+# Size of the grayscale thumbnail used for cheap frame-change detection
+THUMBNAIL_SIZE = (32, 24)
+
+def frame_thumbnail(image: np.ndarray, is_bgr: bool = False) -> np.ndarray:
+    """Downsampled grayscale copy of a frame for frame-difference checks"""
+    small = cv2.resize(image, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY if is_bgr else cv2.COLOR_RGB2GRAY)
+
+def frame_difference(a: np.ndarray, b: np.ndarray) -> float:
+    """Mean absolute pixel difference between two thumbnails, in [0, 1]"""
+    return float(cv2.absdiff(a, b).mean()) / 255.0
@@ -0,0 +1,54 @@
+import logging
+import os
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[int, int, int, int]
+
+class FaceDetector:
+    """
+    Haar cascade face detection and crop stage run before emotion classification.
+
+    Detection runs on a downscaled grayscale copy of the frame; the crop is
+    taken from the full-resolution frame and resized to the classifier input.
+    """
+
+    def __init__(self, detection_width: int = 320, margin: float = 0.15, cascade_path: Optional[str] = None):
+        cascade_path = cascade_path or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise RuntimeError(f"Could not load face cascade from {cascade_path}")
+        self.detection_width = detection_width
+        self.margin = margin
+
+    def detect(self, image: np.ndarray, is_bgr: bool = False) -> Optional[Box]:
+        """Return the largest face as (x, y, w, h) in full-frame pixels, or None"""
+        height, width = image.shape[:2]
+        scale = min(1.0, self.detection_width / width)
+
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if is_bgr else cv2.COLOR_RGB2GRAY)
+        if scale < 1.0:
+            gray = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+        min_side = max(24, int(min(gray.shape[:2]) * 0.1))
+        faces = self.cascade.detectMultiScale(
+            gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_side, min_side)
+        )
+        if len(faces) == 0:
+            return None
+
+        x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+        return (int(x / scale), int(y / scale), int(w / scale), int(h / scale))
+
+    def crop(self, image: np.ndarray, box: Box, size: Tuple[int, int]) -> np.ndarray:
+        """Crop the face (plus margin) and resize it to `size` (width, height)"""
+        height, width = image.shape[:2]
+        x, y, w, h = box
+        pad_x, pad_y = int(w * self.margin), int(h * self.margin)
+        x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+        x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+        return cv2.resize(image[y0:y1, x0:x1], size, interpolation=cv2.INTER_AREA)
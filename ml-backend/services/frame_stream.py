@@ -0,0 +1,34 @@
+import asyncio
+from typing import Any, Optional
+
+class DropOldestQueue:
+    """
+    Bounded frame queue for streaming clients.
+
+    When the client sends faster than we infer, the oldest pending frame is
+    discarded so results always track the most recent frames.
+    """
+
+    def __init__(self, maxsize: int = 1):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, item: Any):
+        self.received += 1
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    async def get(self) -> Any:
+        return await self._queue.get()
+
+    def close(self):
+        """Wake the consumer with a None sentinel"""
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(None)
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+
+from services.emotion_detector import (
+    EmotionDetector,
+    RawFrame,
+    create_detector,
+    decode_frame,
+    frame_difference,
+    frame_thumbnail,
+    stack_frames,
+)
+from services.face_detector import FaceDetector
+from services.frame_cache import FrameCache, dhash
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# One detector per worker process (or per app in inline/thread mode)
+_detector: Optional[EmotionDetector] = None
+_face_detection = True
+_frame_cache: Optional[FrameCache] = None
+
+# 256-bit hash of the classifier input: fine enough to tell expressions apart
+CACHE_HASH_SIZE = 16
+
+def _init_worker(face_detection: bool = True, cache_size: int = 0, cache_ttl: float = 30.0):
+    """Load the model (and an empty result cache) once when a pool worker starts"""
+    global _detector, _face_detection, _frame_cache
+    _detector = create_detector()
+    _face_detection = face_detection
+    _frame_cache = FrameCache(cache_size, cache_ttl) if cache_size > 0 else None
+    logger.info(
+        f"Inference worker {os.getpid()} ready (face detection {'on' if face_detection else 'off'}, "
+        f"frame cache {cache_size or 'off'})"
+    )
+
+def _get_detector() -> EmotionDetector:
+    if _detector is None:
+        _init_worker()
+    return _detector
+
+# Per-thread state: stacking buffer reused across batches of the same frame
+# size, and a face cascade (cv2.CascadeClassifier is not thread-safe)
+_buffers = threading.local()
+
+def _face_detector() -> Optional[FaceDetector]:
+    if not _face_detection:
+        return None
+    face_detector = getattr(_buffers, "face_detector", None)
+    if face_detector is None:
+        face_detector = FaceDetector()
+        _buffers.face_detector = face_detector
+    return face_detector
+
+def _frame_buffer(count: int, height: int, width: int) -> np.ndarray:
+    buffer = getattr(_buffers, "frames", None)
+    if buffer is None or buffer.shape[1:3] != (height, width) or buffer.shape[0] < count:
+        buffer = np.empty((count, height, width, 3), dtype=np.uint8)
+        _buffers.frames = buffer
+    return buffer[:count]
+
+def analyze_frames(
+    images: List[Union[str, bytes, RawFrame]],
+    references: Optional[List[Optional[np.ndarray]]] = None,
+    change_threshold: float = 0.0,
+) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Decode, face-crop and score a list of encoded frames.
+
+    Runs inside a pool worker so the CPU-bound decode and inference never
+    touch the event loop. A frame that fails to decode yields its exception
+    in place of a result so it does not fail the rest of the batch. Frames
+    with no face return early with `face_detected: False` and are never
+    sent to the classifier.
+
+    When `references` is given (session-bound frames), each result carries
+    a grayscale `thumbnail`, and a frame whose thumbnail differs from its
+    reference by less than `change_threshold` is returned as `skipped`
+    without face detection or classification.
+
+    With the frame cache enabled, a face crop whose perceptual hash was
+    scored recently reuses those scores (`cache_hit: True`). The key is
+    the crop the classifier would see, not the whole scene. Session frames
+    that passed the change test bypass the cache, because they are known to
+    differ from what was last scored.
+    """
+    detector = _get_detector()
+    face_detector = _face_detector()
+    results: List[Union[Dict[str, Any], Exception]] = [None] * len(images)
+    pending = []
+    for i, data in enumerate(images):
+        try:
+            image, is_bgr = decode_frame(data)
+        except ValueError as e:
+            results[i] = e
+            continue
+
+        result = {"shape": list(image.shape), "face_detected": True}
+        use_cache = _frame_cache is not None
+        if references is not None:
+            thumbnail = frame_thumbnail(image, is_bgr)
+            reference = references[i]
+            if reference is not None:
+                if frame_difference(thumbnail, reference) < change_threshold:
+                    results[i] = {**result, "skipped": True}
+                    continue
+                use_cache = False
+            result["thumbnail"] = thumbnail
+
+        if face_detector is not None:
+            box = face_detector.detect(image, is_bgr)
+            if box is None:
+                results[i] = {**result, "face_detected": False, "emotions": {}}
+                continue
+            result["face_box"] = list(box)
+            image = face_detector.crop(image, box, detector.input_size)
+
+        key = None
+        if use_cache:
+            key = dhash(image, is_bgr, CACHE_HASH_SIZE)
+            cached = _frame_cache.get(key)
+            if cached is not None:
+                results[i] = {**result, "emotions": cached["emotions"], "cache_hit": True}
+                continue
+            result["cache_hit"] = False
+        pending.append((i, key, result, image, is_bgr))
+
+    if pending:
+        crops = [image for _, _, _, image, _ in pending]
+        height, width = crops[0].shape[:2]
+        frames = stack_frames(
+            crops,
+            bgr=[is_bgr for _, _, _, _, is_bgr in pending],
+            out=_frame_buffer(len(crops), height, width),
+        )
+        batch_scores = detector.detect_batch(frames)
+        for (i, key, result, _, _), emotion_scores in zip(pending, batch_scores):
+            results[i] = {**result, "emotions": emotion_scores}
+            if key is not None:
+                _frame_cache.put(key, {"emotions": emotion_scores})
+
+    return results
+
+class InferencePool:
+    """
+    Runs decode/inference work off the event loop.
+
+    `mode` is one of:
+      - "inline":  run on the event loop (no pool, the old behaviour)
+      - "thread":  thread pool sharing one detector
+      - "process": process pool with the model loaded once per worker
+    """
+
+    def __init__(
+        self,
+        mode: str = "process",
+        max_workers: Optional[int] = None,
+        face_detection: bool = True,
+        cache_size: int = 0,
+        cache_ttl: float = 30.0,
+    ):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {EXECUTION_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.face_detection = face_detection
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
+        # Frame cache lookups, aggregated from worker results (each worker has its own cache)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._executor: Optional[Executor] = None
+
+    def start(self):
+        """Create the worker pool"""
+        if self._executor is not None:
+            return
+        worker_args = (self.face_detection, self.cache_size, self.cache_ttl)
+        if self.mode == "inline":
+            _init_worker(*worker_args)
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=worker_args,
+            )
+        else:
+            _init_worker(*worker_args)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        logger.info(f"Inference pool started ({self.mode}, {self.max_workers} workers)")
+
+    def shutdown(self):
+        """Stop the workers, dropping queued work"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        logger.info("Inference pool stopped")
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run `fn(*args)` on the pool (or inline when no pool is active)"""
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def record_cache_lookups(self, results: List[Any]):
+        """Count frame cache hits/misses reported by analyze_frames results"""
+        for result in results:
+            if isinstance(result, dict) and "cache_hit" in result:
+                if result["cache_hit"]:
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+
+    def cache_stats(self) -> Dict[str, Any]:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "enabled": self.cache_size > 0,
+            "max_entries_per_worker": self.cache_size,
+            "ttl": self.cache_ttl,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers if self.mode != "inline" else 0,
+            "running": self._executor is not None,
+            "face_detection": self.face_detection,
+        }
@@ -0,0 +1,191 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-frame requests into micro-batches.
+
+    Callers `submit()` one frame and await its result. A background task
+    drains the queue, waiting at most `max_wait_ms` after the first frame
+    arrives (or until `max_batch_size` frames are queued) and then scores
+    the whole batch with `batch_fn`, resolving each caller's future.
+
+    Up to `max_concurrency` batches are scored at once (match it to the
+    inference pool's worker count); the loop keeps collecting the next
+    batch while earlier ones run, and waits for a free slot only when all
+    of them are busy.
+
+    `batch_fn` may be sync or async and returns one result per frame; a
+    result that is an Exception is raised to that frame's caller only.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Union[List[Any], Awaitable[List[Any]]]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0,
+        max_concurrency: int = 1,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrency = max(1, max_concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._batches: Set[asyncio.Task] = set()
+
+        # Tuning metrics
+        self.batch_size_histogram: Counter = Counter()
+        self.queue_depth_histogram: Counter = Counter()
+        self.total_frames = 0
+        self.total_batches = 0
+        self.peak_concurrency = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the background batching loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f}, max_concurrency={self.max_concurrency})"
+        )
+
+    async def stop(self):
+        """Stop the batching loop, cancel batches in flight and fail any frames still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        batches = list(self._batches)
+        for task in batches:
+            task.cancel()
+        await asyncio.gather(*batches, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+        logger.info("Micro-batcher stopped")
+
+    async def submit(self, frame: Any) -> Any:
+        """Queue a single frame and wait for its scores"""
+        if not self.running:
+            raise RuntimeError("Micro-batcher is not running")
+
+        self.queue_depth_histogram[self._bucket(self._queue.qsize())] += 1
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((frame, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Wait for a free slot first: frames keep queueing meanwhile, so
+            # a busy pool gets fuller batches instead of a backlog of small ones
+            await self._slots.acquire()
+            try:
+                batch = [await self._queue.get()]
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that gave up (e.g. client disconnect) are not scored
+            batch = [(frame, future) for frame, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._process(batch))
+            self._batches.add(task)
+            self.peak_concurrency = max(self.peak_concurrency, len(self._batches))
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        self._batches.discard(task)
+        self._slots.release()
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future]]):
+        frames = [frame for frame, _ in batch]
+        started = time.perf_counter()
+        try:
+            results = self.batch_fn(frames)
+            if inspect.isawaitable(results):
+                results = await results
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Micro-batcher stopped"))
+            raise
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batch_size_histogram[len(batch)] += 1
+        self.total_batches += 1
+        self.total_frames += len(batch)
+        logger.debug(f"Scored micro-batch of {len(batch)} in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _bucket(depth: int) -> str:
+        """Power-of-two bucket label for the queue depth histogram"""
+        if depth == 0:
+            return "0"
+        upper = 1 << (depth - 1).bit_length()
+        lower = upper // 2 + 1
+        return str(upper) if lower >= upper else f"{lower}-{upper}"
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and batch size metrics for tuning"""
+        return {
+            "running": self.running,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_concurrency": self.max_concurrency,
+            "batches_in_flight": len(self._batches),
+            "peak_concurrency": self.peak_concurrency,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "total_frames": self.total_frames,
+            "total_batches": self.total_batches,
+            "mean_batch_size": self.total_frames / self.total_batches if self.total_batches else 0.0,
+            "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_size_histogram.items())},
+            "queue_depth_histogram": dict(self.queue_depth_histogram),
+        }
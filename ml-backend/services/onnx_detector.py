@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # Optional dependency, only needed for EMOTION_BACKEND=onnx
+    ort = None
+
+logger = logging.getLogger(__name__)
+
+# Label order of the common FER-2013 style facial-expression models
+DEFAULT_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprised", "neutral"]
+
+# Normalise label spellings used by different model zoos
+LABEL_ALIASES = {"surprise": "surprised", "fearful": "fear", "disgusted": "disgust", "happiness": "happy", "sadness": "sad", "anger": "angry"}
+
+def _fixed(dim) -> bool:
+    # onnxruntime reports dynamic dims as a name ("height") or None
+    return isinstance(dim, int) and dim > 0
+
+def parse_input_size(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a `WIDTHxHEIGHT` setting such as "64x64" (None when unset)"""
+    if not value:
+        return None
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid input size '{value}', expected WIDTHxHEIGHT (e.g. 64x64)") from None
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid input size '{value}', expected WIDTHxHEIGHT (e.g. 64x64)")
+    return width, height
+
+def input_layout(shape: Sequence, input_size: Optional[Tuple[int, int]] = None) -> Tuple[bool, int, Tuple[int, int]]:
+    """
+    (channels_first, channels, (width, height)) for a model input shape.
+
+    Accepts NCHW (1 or 3 channels) or NHWC. Dynamic spatial dims take
+    `input_size`; without it they are an error, as is a dynamic channel dim.
+    """
+    if len(shape) != 4:
+        raise ValueError(f"Expected a 4-D image input (NCHW or NHWC), got shape {list(shape)}")
+    channels_first = shape[1] in (1, 3)
+    if channels_first:
+        channels, height, width = shape[1], shape[2], shape[3]
+    else:
+        height, width, channels = shape[1], shape[2], shape[3]
+    if channels not in (1, 3):
+        raise ValueError(f"Unsupported input shape {list(shape)}: expected 1 or 3 fixed channels")
+
+    if _fixed(width) and _fixed(height):
+        return channels_first, channels, (width, height)
+    if input_size is None:
+        raise ValueError(
+            f"Model input {list(shape)} has dynamic spatial dimensions; "
+            f"set ONNX_INPUT_SIZE (e.g. 64x64) to choose one"
+        )
+    return channels_first, channels, (
+        width if _fixed(width) else input_size[0],
+        height if _fixed(height) else input_size[1],
+    )
+
+class OnnxEmotionDetector:
+    """
+    CPU-only facial-expression classifier backed by an ONNX model.
+
+    The session is created once (per worker) with tuned thread counts and
+    full graph optimisation, and input/output buffers are preallocated per
+    batch size and bound through IOBinding so steady-state inference does
+    not allocate. Keeps the EmotionDetector `Dict[str, float]` contract.
+
+    `input_size` (width, height) is only used for models exported with
+    dynamic spatial dimensions.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        labels: Optional[List[str]] = None,
+        intra_op_threads: int = 1,
+        inter_op_threads: int = 1,
+        input_size: Optional[Tuple[int, int]] = None,
+    ):
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed; pip install onnxruntime")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found at {model_path}")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.enable_mem_pattern = True
+        options.enable_cpu_mem_arena = True
+
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.intra_op_threads = intra_op_threads
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.output_name = self.session.get_outputs()[0].name
+
+        shape = model_input.shape
+        self.channels_first, self.channels, self.input_size = input_layout(shape, input_size)
+        width, height = self.input_size
+        self.fixed_batch = shape[0] if _fixed(shape[0]) else None
+
+        self.emotions = [
+            LABEL_ALIASES.get(label.lower(), label.lower())
+            for label in (labels or self._load_labels(model_path) or DEFAULT_LABELS)
+        ]
+        # IOBinding buffers are per thread so a shared detector stays thread-safe
+        self._local = threading.local()
+
+        logger.info(
+            f"Loaded ONNX emotion model {os.path.basename(model_path)} "
+            f"(input {self.channels}x{height}x{width}, {len(self.emotions)} labels, "
+            f"{intra_op_threads} intra-op threads)"
+        )
+
+    @staticmethod
+    def _load_labels(model_path: str) -> Optional[List[str]]:
+        """Read `<model>.labels.txt` (one label per line) next to the model if present"""
+        labels_path = os.path.splitext(model_path)[0] + ".labels.txt"
+        if not os.path.exists(labels_path):
+            return None
+        with open(labels_path) as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def _io_buffers(self, batch_size: int):
+        """Preallocated input/output arrays and their IOBinding for a batch size"""
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None:
+            buffers = self._local.buffers = {}
+        if batch_size not in buffers:
+            width, height = self.input_size
+            if self.channels_first:
+                input_shape = (batch_size, self.channels, height, width)
+            else:
+                input_shape = (batch_size, height, width, self.channels)
+            inputs = np.empty(input_shape, dtype=np.float32)
+            outputs = np.empty((batch_size, len(self.emotions)), dtype=np.float32)
+
+            binding = self.session.io_binding()
+            binding.bind_cpu_input(self.input_name, inputs)
+            binding.bind_output(
+                self.output_name, "cpu", 0, np.float32, list(outputs.shape), outputs.ctypes.data
+            )
+            buffers[batch_size] = (inputs, outputs, binding)
+        return buffers[batch_size]
+
+    def _preprocess(self, frames: np.ndarray, out: np.ndarray):
+        """Resize/convert (N, H, W, 3) uint8 RGB frames into the model input buffer"""
+        width, height = self.input_size
+        for i, frame in enumerate(frames):
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            if self.channels == 1:
+                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)[..., np.newaxis]
+            if self.channels_first:
+                np.multiply(frame.transpose(2, 0, 1), 1.0 / 255.0, out=out[i], casting="unsafe")
+            else:
+                np.multiply(frame, 1.0 / 255.0, out=out[i], casting="unsafe")
+
+    def detect_emotion(self, image_array: np.ndarray) -> Dict[str, float]:
+        return self.detect_batch(image_array[np.newaxis])[0]
+
+    def detect_batch(self, frames: np.ndarray) -> List[Dict[str, float]]:
+        """Score a stacked batch of frames (N, H, W, 3) in one session run"""
+        if frames.ndim != 4:
+            raise ValueError(f"Expected frames of shape (N, H, W, 3), got {frames.shape}")
+
+        # Models exported with a fixed batch dimension are run one (padded) chunk at a time
+        chunk = self.fixed_batch or len(frames)
+        results: List[Dict[str, float]] = []
+        for start in range(0, len(frames), chunk):
+            batch = frames[start:start + chunk]
+            inputs, outputs, binding = self._io_buffers(chunk)
+            self._preprocess(batch, inputs)
+            self.session.run_with_iobinding(binding)
+
+            scores = outputs[:len(batch)].astype(np.float64)
+            # Apply softmax unless the model already outputs probabilities
+            if not np.allclose(scores.sum(axis=1), 1.0, atol=1e-3) or (scores < 0).any():
+                scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+                scores /= scores.sum(axis=1, keepdims=True)
+
+            results.extend(dict(zip(self.emotions, row.tolist())) for row in scores)
+        return results
@@ -0,0 +1,86 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+class SessionState:
+    """
+    Per-session emotion stream state.
+
+    Keeps an exponential moving average of the emotion vector and the
+    thumbnail of the last frame that was actually scored, so near-identical
+    follow-up frames can skip inference and reuse the smoothed result.
+    """
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.labels: Optional[list] = None
+        self.ema: Optional[np.ndarray] = None
+        self.thumbnail: Optional[np.ndarray] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_seen = time.monotonic()
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+    def update(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold a worker result into the session and return the smoothed result"""
+        self.last_seen = time.monotonic()
+        self.frames_seen += 1
+
+        if result.get("skipped") and self.last_result is not None:
+            self.frames_skipped += 1
+            return {**self.last_result, "skipped": True}
+
+        self.thumbnail = result.get("thumbnail")
+        if result.get("face_detected", True) and result["emotions"]:
+            labels = list(result["emotions"])
+            scores = np.fromiter(result["emotions"].values(), dtype=np.float64, count=len(labels))
+            if self.ema is None or labels != self.labels:
+                self.labels, self.ema = labels, scores
+            else:
+                self.ema = self.alpha * scores + (1.0 - self.alpha) * self.ema
+            result = {**result, "emotions": dict(zip(self.labels, self.ema.tolist()))}
+
+        self.last_result = {key: value for key, value in result.items() if key != "thumbnail"}
+        return {**self.last_result, "skipped": False}
+
+class SessionStore:
+    """LRU of active sessions with idle-time eviction"""
+
+    def __init__(self, alpha: float = 0.3, max_sessions: int = 10000, idle_ttl: float = 300.0):
+        self.alpha = alpha
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+
+    def get(self, session_id: str) -> SessionState:
+        """Return the session's state, creating it (and evicting stale sessions) as needed"""
+        session = self._sessions.get(session_id)
+        if session is None or time.monotonic() - session.last_seen > self.idle_ttl:
+            session = SessionState(self.alpha)
+            self._sessions[session_id] = session
+            self._evict()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def discard(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and oldest.last_seen >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        seen = sum(session.frames_seen for session in self._sessions.values())
+        skipped = sum(session.frames_skipped for session in self._sessions.values())
+        return {
+            "active_sessions": len(self._sessions),
+            "frames_seen": seen,
+            "frames_skipped": skipped,
+            "skip_ratio": skipped / seen if seen else 0.0,
+        }
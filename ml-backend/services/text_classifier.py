@@ -0,0 +1,179 @@
+import csv
+import logging
+import re
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+class HashedNgramVectorizer:
+    """
+    Stateless text featurizer: word 1-2 grams and character 3-5 grams hashed
+    into a fixed number of buckets with CRC32 (stable across processes,
+    unlike Python's randomized hash()). Returns sparse (indices, values)
+    rows, L2-normalised.
+    """
+
+    def __init__(self, n_features: int = 2 ** 16, word_ngrams: Tuple[int, int] = (1, 2), char_ngrams: Tuple[int, int] = (3, 5)):
+        self.n_features = n_features
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+
+    def _ngrams(self, text: str) -> List[str]:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        grams = []
+        for n in range(self.word_ngrams[0], self.word_ngrams[1] + 1):
+            grams.extend("w:" + " ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        for token in tokens:
+            padded = f" {token} "
+            for n in range(self.char_ngrams[0], self.char_ngrams[1] + 1):
+                grams.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+        return grams
+
+    def transform_one(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        hashes = [zlib.crc32(gram.encode("utf-8")) % self.n_features for gram in self._ngrams(text)]
+        if not hashes:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        indices, counts = np.unique(np.asarray(hashes, dtype=np.int64), return_counts=True)
+        values = counts.astype(np.float32)
+        values /= np.linalg.norm(values)
+        return indices, values
+
+class TextRiskClassifier:
+    """
+    Multinomial logistic regression over hashed n-grams for triaging chat
+    messages into mental-health risk levels (e.g. Critical/Moderate/Healthy).
+
+    Scoring a message is a gather-and-sum over a few hundred weight rows,
+    so it runs in microseconds without another LLM round-trip.
+    """
+
+    def __init__(self, labels: Sequence[str], vectorizer: Optional[HashedNgramVectorizer] = None):
+        self.labels = list(labels)
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self.weights = np.zeros((self.vectorizer.n_features, len(self.labels)), dtype=np.float32)
+        self.bias = np.zeros(len(self.labels), dtype=np.float32)
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 300,
+        learning_rate: float = 0.5,
+        l2: float = 1e-4,
+        vectorizer: Optional[HashedNgramVectorizer] = None,
+    ) -> "TextRiskClassifier":
+        """Fit with full-batch gradient descent on the sparse hashed features"""
+        model = cls(sorted(set(labels)), vectorizer)
+        rows = [model.vectorizer.transform_one(text) for text in texts]
+        targets = np.zeros((len(texts), len(model.labels)), dtype=np.float32)
+        targets[np.arange(len(texts)), [model.labels.index(label) for label in labels]] = 1.0
+
+        # Flatten the sparse rows once so each epoch is a few vectorised ops
+        row_ids = np.concatenate([np.full(len(indices), i) for i, (indices, _) in enumerate(rows)])
+        cols = np.concatenate([indices for indices, _ in rows])
+        vals = np.concatenate([values for _, values in rows])[:, np.newaxis]
+
+        for _ in range(epochs):
+            logits = np.zeros_like(targets)
+            np.add.at(logits, row_ids, model.weights[cols] * vals)
+            probs = _softmax(logits + model.bias)
+            error = (probs - targets) / len(texts)
+
+            grad = np.zeros_like(model.weights)
+            np.add.at(grad, cols, error[row_ids] * vals)
+            model.weights -= learning_rate * (grad + l2 * model.weights)
+            model.bias -= learning_rate * error.sum(axis=0)
+
+        logger.info(f"Trained text classifier on {len(texts)} messages")
+        return model
+
+    @classmethod
+    def train_from_csv(cls, csv_path: str, text_column: str = "chat_text", label_column: str = "mental_health_level", **kwargs) -> "TextRiskClassifier":
+        return cls.train(*read_labelled_csv(csv_path, text_column, label_column), **kwargs)
+
+    @classmethod
+    def cross_validate(cls, texts: Sequence[str], labels: Sequence[str], folds: int = 5, seed: int = 0, **kwargs) -> Dict[str, float]:
+        """
+        Stratified k-fold accuracy: every message is scored by a model that
+        never saw it. Each label is dealt round-robin across the folds, so
+        a label with fewer than `folds` examples is missing from some folds.
+        """
+        rng = np.random.default_rng(seed)
+        fold_of = np.empty(len(texts), dtype=np.int64)
+        for label in sorted(set(labels)):
+            members = rng.permutation([i for i, other in enumerate(labels) if other == label])
+            fold_of[members] = np.arange(len(members)) % folds
+
+        correct = 0
+        fold_accuracies = []
+        for fold in range(folds):
+            held_out = np.flatnonzero(fold_of == fold)
+            if len(held_out) == 0:
+                continue
+            kept = np.flatnonzero(fold_of != fold)
+            model = cls.train([texts[i] for i in kept], [labels[i] for i in kept], **kwargs)
+            hits = sum(
+                max(scores.items(), key=lambda item: item[1])[0] == labels[i]
+                for i, scores in zip(held_out, model.predict_batch([texts[i] for i in held_out]))
+            )
+            correct += hits
+            fold_accuracies.append(hits / len(held_out))
+
+        return {
+            "folds": len(fold_accuracies),
+            "accuracy": correct / len(texts),
+            "fold_std": float(np.std(fold_accuracies)),
+            "majority_baseline": max(list(labels).count(label) for label in set(labels)) / len(labels),
+        }
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        indices, values = self.vectorizer.transform_one(text)
+        logits = values @ self.weights[indices] + self.bias
+        return dict(zip(self.labels, _softmax(logits[np.newaxis])[0].tolist()))
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        return [self.predict_proba(text) for text in texts]
+
+    def save(self, path: str):
+        """Serialise weights and vectorizer settings to a .npz file"""
+        # Only non-zero weight rows are stored; untouched hash buckets stay zero
+        used = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            rows=used,
+            weights=self.weights[used],
+            bias=self.bias,
+            n_features=self.vectorizer.n_features,
+            word_ngrams=np.array(self.vectorizer.word_ngrams),
+            char_ngrams=np.array(self.vectorizer.char_ngrams),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "TextRiskClassifier":
+        data = np.load(path)
+        vectorizer = HashedNgramVectorizer(
+            n_features=int(data["n_features"]),
+            word_ngrams=tuple(int(n) for n in data["word_ngrams"]),
+            char_ngrams=tuple(int(n) for n in data["char_ngrams"]),
+        )
+        model = cls([str(label) for label in data["labels"]], vectorizer)
+        model.weights[data["rows"]] = data["weights"]
+        model.bias[:] = data["bias"]
+        return model
+
+def read_labelled_csv(csv_path: str, text_column: str = "chat_text", label_column: str = "mental_health_level") -> Tuple[List[str], List[str]]:
+    """(texts, labels) from the rows of a CSV that have both columns filled in"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.DictReader(f) if row.get(text_column) and row.get(label_column)]
+    return [row[text_column] for row in rows], [row[label_column] for row in rows]
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
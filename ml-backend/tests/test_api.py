@@ -0,0 +1,135 @@
+import asyncio
+import base64
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+# Score on the event loop: no worker processes to spawn in tests. The
+# synthetic frames have no face, so classify whole frames unless a test
+# turns face detection back on.
+os.environ.setdefault("INFERENCE_EXECUTION_MODE", "inline")
+os.environ.setdefault("ENABLE_FACE_DETECTION", "false")
+
+import app  # noqa: E402
+
+def encoded_frame(value: int, height: int = 48, width: int = 64) -> str:
+    image = np.full((height, width, 3), value, dtype=np.uint8)
+    ok, png = cv2.imencode(".png", image)
+    assert ok
+    return base64.b64encode(png.tobytes()).decode()
+
+@pytest.fixture
+def client():
+    with TestClient(app.app) as client:
+        yield client
+
+def test_detect_batch_scores_every_frame():
+    frames = np.zeros((3, 16, 16, 3), dtype=np.uint8)
+    scores = app.detector.detect_batch(frames)
+    assert len(scores) == 3
+    for row in scores:
+        assert set(row) == set(app.detector.emotions)
+        assert sum(row.values()) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        app.detector.detect_batch(frames[0])
+
+def test_batch_endpoint(client):
+    # Frames of different sizes are resized to the first one before stacking
+    images = [encoded_frame(10), encoded_frame(200, 32, 32), "data:image/png;base64," + encoded_frame(90)]
+    response = client.post("/detect_emotion_batch", json={"images": images})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3 and len(body["results"]) == 3
+    for result in body["results"]:
+        assert result["emotion"] in result["emotions"] or result["emotion"] == "neutral"
+
+def test_batch_endpoint_limits(client, monkeypatch):
+    assert client.post("/detect_emotion_batch", json={"images": []}).status_code == 400
+    monkeypatch.setattr(app, "MAX_BATCH_SIZE", 2)
+    response = client.post("/detect_emotion_batch", json={"images": [encoded_frame(1)] * 3})
+    assert response.status_code == 413
+
+def test_single_frame_endpoint(client):
+    response = client.post("/detect_emotion", json={"image": encoded_frame(128)})
+    assert response.status_code == 200
+    assert set(response.json()["emotions"]) == set(app.detector.emotions)
+
+def test_invalid_image(client):
+    response = client.post("/detect_emotion", json={"image": base64.b64encode(b"not an image").decode()})
+    assert response.status_code == 400
+
+def test_raw_encoded_frame(client):
+    ok, png = cv2.imencode(".png", np.full((48, 64, 3), 60, dtype=np.uint8))
+    response = client.post("/detect_emotion_raw", content=png.tobytes(), headers={"content-type": "image/png"})
+    assert response.status_code == 200
+    assert set(response.json()["emotions"]) == set(app.detector.emotions)
+
+def test_raw_rgb_frame(client):
+    body = np.full((24, 32, 3), 200, dtype=np.uint8).tobytes()
+    headers = {"content-type": "application/octet-stream", "x-frame-width": "32", "x-frame-height": "24"}
+    response = client.post("/detect_emotion_raw", content=body, headers=headers)
+    assert response.status_code == 200
+
+    # Body length has to match the declared frame size
+    headers["x-frame-width"] = "31"
+    assert client.post("/detect_emotion_raw", content=body, headers=headers).status_code == 400
+
+def test_raw_endpoint_rejects_bad_requests(client):
+    assert client.post("/detect_emotion_raw", content=b"", headers={"content-type": "image/png"}).status_code == 400
+    assert client.post("/detect_emotion_raw", content=b"x", headers={"content-type": "text/plain"}).status_code == 415
+    response = client.post("/detect_emotion_raw", content=b"\0" * 12, headers={"content-type": "application/octet-stream"})
+    assert response.status_code == 400
+
+def png_bytes(value: int) -> bytes:
+    return base64.b64decode(encoded_frame(value))
+
+def test_stream_scores_binary_and_json_frames(client):
+    with client.websocket_connect("/ws/emotion") as ws:
+        ws.send_bytes(png_bytes(40))
+        assert set(ws.receive_json()["emotions"]) == set(app.detector.emotions)
+        ws.send_text('{"image": "%s"}' % encoded_frame(80))
+        assert "emotions" in ws.receive_json()
+        ws.send_text("not json")
+        assert "error" in ws.receive_json()
+        ws.send_bytes(b"not an image")
+        assert "error" in ws.receive_json()
+
+def test_stream_drops_oldest_frames_while_busy(client, monkeypatch):
+    analyze = app.analyze_frame
+    scored = []
+    received = app.stream_stats["frames_received"]
+
+    async def slow_analyze(image, *args):
+        scored.append(image)
+        # Hold the first frame until the client has sent three more
+        while app.stream_stats["frames_received"] < received + 4:
+            await asyncio.sleep(0.01)
+        return await analyze(image, *args)
+
+    monkeypatch.setattr(app, "analyze_frame", slow_analyze)
+    dropped = app.stream_stats["frames_dropped"]
+    frames = [png_bytes(value) for value in (10, 20, 30, 40)]
+    with client.websocket_connect("/ws/emotion") as ws:
+        ws.send_bytes(frames[0])
+        while not scored:
+            time.sleep(0.01)
+        for frame in frames[1:]:
+            ws.send_bytes(frame)
+        ws.receive_json()
+        ws.receive_json()
+
+    # Only the newest pending frame survives behind the one being scored
+    assert scored == [frames[0], frames[3]]
+    assert app.stream_stats["frames_dropped"] - dropped == 2
+
+def test_frames_without_a_face_skip_the_classifier(monkeypatch):
+    monkeypatch.setattr(app.inference_pool, "face_detection", True)
+    with TestClient(app.app) as client:
+        response = client.post("/detect_emotion", json={"image": encoded_frame(128)})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["emotion"], body["face_detected"], body["emotions"]) == ("no_face", False, {})
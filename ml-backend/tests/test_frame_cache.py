@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from services import frame_cache, inference_pool
+from services.emotion_detector import RawFrame, frame_thumbnail
+from services.frame_cache import FrameCache, dhash
+
+def frame(seed: int, height: int = 48, width: int = 64) -> RawFrame:
+    pixels = np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return RawFrame(pixels.tobytes(), height, width)
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setenv("EMOTION_BACKEND", "mock")
+    inference_pool._init_worker(face_detection=False, cache_size=16, cache_ttl=30)
+    yield
+    inference_pool._init_worker(face_detection=False, cache_size=0)
+
+def test_dhash_size():
+    image = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    assert dhash(image) < 1 << 64
+    assert dhash(image, size=16) < 1 << 256
+    assert dhash(image, size=16) == dhash(image.copy(), size=16)
+
+def test_dhash_tolerates_small_changes():
+    image = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    noisy = np.clip(image.astype(int) + 1, 0, 255).astype(np.uint8)
+    assert bin(dhash(image) ^ dhash(noisy)).count("1") <= 4
+
+def test_cache_expires_and_evicts(monkeypatch):
+    cache = FrameCache(max_entries=2, ttl=30)
+    cache.put(1, {"emotions": {}})
+    cache.put(2, {"emotions": {}})
+    cache.put(3, {"emotions": {}})
+    assert cache.get(1) is None and cache.get(3) is not None
+
+    monkeypatch.setattr(frame_cache.time, "monotonic", lambda: 1e12)
+    assert cache.get(3) is None
+
+def test_repeated_sessionless_frame_hits(worker):
+    first = inference_pool.analyze_frames([frame(1)])[0]
+    second = inference_pool.analyze_frames([frame(1)])[0]
+    assert first["cache_hit"] is False
+    assert second["cache_hit"] is True
+    assert second["emotions"] == first["emotions"]
+    assert inference_pool.analyze_frames([frame(2)])[0]["cache_hit"] is False
+
+def test_changed_session_frame_bypasses_cache(worker):
+    # Score and cache the frame once without a session
+    image = frame(1)
+    inference_pool.analyze_frames([image])
+
+    # The same picture arrives for a session whose last scored frame was different
+    other = np.frombuffer(frame(2).data, dtype=np.uint8).reshape(48, 64, 3)
+    reference = frame_thumbnail(other, False)
+    result = inference_pool.analyze_frames([image], [reference], 0.01)[0]
+    assert "cache_hit" not in result
+    assert not result.get("skipped")
+
+def test_unchanged_session_frame_is_skipped(worker):
+    image = frame(1)
+    pixels = np.frombuffer(image.data, dtype=np.uint8).reshape(48, 64, 3)
+    result = inference_pool.analyze_frames([image], [frame_thumbnail(pixels, False)], 0.01)[0]
+    assert result["skipped"] is True
@@ -0,0 +1,33 @@
+import asyncio
+
+from services.frame_stream import DropOldestQueue
+
+def test_keeps_only_the_newest_frames():
+    async def scenario():
+        queue = DropOldestQueue(2)
+        for frame in (1, 2, 3, 4):
+            queue.put(frame)
+        assert queue.qsize() == 2
+        assert (queue.received, queue.dropped) == (4, 2)
+        return [await queue.get(), await queue.get()]
+
+    assert asyncio.run(scenario()) == [3, 4]
+
+def test_close_wakes_the_consumer():
+    async def scenario():
+        queue = DropOldestQueue(1)
+        waiter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0)
+        queue.close()
+        return await waiter
+
+    assert asyncio.run(scenario()) is None
+
+def test_close_replaces_a_pending_frame_when_full():
+    async def scenario():
+        queue = DropOldestQueue(1)
+        queue.put("frame")
+        queue.close()
+        return await queue.get()
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from services.emotion_detector import RawFrame
+from services.inference_pool import InferencePool, analyze_frames
+
+def frame(value: int) -> RawFrame:
+    return RawFrame(np.full((32, 32, 3), value, dtype=np.uint8).tobytes(), 32, 32)
+
+@pytest.fixture(autouse=True)
+def mock_backend(monkeypatch):
+    monkeypatch.setenv("EMOTION_BACKEND", "mock")
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        InferencePool(mode="gpu")
+
+def test_bad_frames_fail_alone():
+    pool = InferencePool(mode="inline", face_detection=False)
+    pool.start()
+    results = asyncio.run(pool.run(analyze_frames, [frame(10), b"not an image", frame(20)]))
+    assert isinstance(results[1], ValueError)
+    for result in (results[0], results[2]):
+        assert result["face_detected"] is True
+        assert sum(result["emotions"].values()) == pytest.approx(1.0)
+
+def test_thread_pool_runs_work_in_parallel():
+    pool = InferencePool(mode="thread", max_workers=4, face_detection=False)
+    pool.start()
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(i):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return i
+
+    async def scenario():
+        return await asyncio.gather(*(pool.run(work, i) for i in range(8)))
+
+    try:
+        assert asyncio.run(scenario()) == list(range(8))
+    finally:
+        pool.shutdown()
+    assert peak == 4
+    assert pool.stats()["running"] is False
+
+def test_cache_lookups_are_counted():
+    pool = InferencePool(mode="inline", cache_size=8)
+    pool.record_cache_lookups([{"cache_hit": True}, {"cache_hit": False}, {"emotions": {}}, ValueError()])
+    stats = pool.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from services.micro_batcher import MicroBatcher
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_results_go_back_to_their_callers():
+    async def scenario():
+        batcher = MicroBatcher(lambda frames: [frame * 10 for frame in frames], max_batch_size=4, max_wait_ms=5)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        finally:
+            await batcher.stop()
+
+    assert run(scenario()) == [i * 10 for i in range(10)]
+
+def test_concurrent_submits_are_batched():
+    async def scenario():
+        sizes = []
+
+        def score(frames):
+            sizes.append(len(frames))
+            return frames
+
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=20)
+        await batcher.start()
+        try:
+            await asyncio.gather(*(batcher.submit(i) for i in range(16)))
+        finally:
+            await batcher.stop()
+        return sizes, batcher.stats()
+
+    sizes, stats = run(scenario())
+    assert sizes == [8, 8]
+    assert stats["total_frames"] == 16
+    assert stats["total_batches"] == 2
+
+def test_batches_run_concurrently_up_to_the_limit():
+    async def scenario():
+        running = 0
+        peak = 0
+
+        async def score(frames):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            return frames
+
+        batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=1, max_concurrency=3)
+        await batcher.start()
+        try:
+            results = await asyncio.gather(*(batcher.submit(i) for i in range(64)))
+        finally:
+            await batcher.stop()
+        return results, peak, batcher.stats()
+
+    results, peak, stats = run(scenario())
+    assert results == list(range(64))
+    assert peak == 3
+    assert stats["peak_concurrency"] == 3
+
+def test_failures_reach_only_the_affected_callers():
+    async def scenario():
+        def score(frames):
+            return [ValueError(f"bad {frame}") if frame % 2 else frame for frame in frames]
+
+        batcher = MicroBatcher(score, max_batch_size=4, max_wait_ms=5)
+        await batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(i) for i in range(4)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = run(scenario())
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ValueError) and isinstance(results[3], ValueError)
+
+def test_stop_cancels_batches_in_flight():
+    async def scenario():
+        started = asyncio.Event()
+
+        async def score(frames):
+            started.set()
+            await asyncio.sleep(10)
+            return frames
+
+        batcher = MicroBatcher(score, max_batch_size=2, max_wait_ms=1, max_concurrency=2)
+        await batcher.start()
+        pending = asyncio.gather(*(batcher.submit(i) for i in range(2)), return_exceptions=True)
+        await started.wait()
+        await asyncio.wait_for(batcher.stop(), 1)
+        return await pending, batcher.stats()
+
+    results, stats = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["batches_in_flight"] == 0
+
+def test_submit_requires_a_running_batcher():
+    with pytest.raises(RuntimeError):
+        run(MicroBatcher(lambda frames: frames).submit(1))
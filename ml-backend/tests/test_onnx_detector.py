@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from services.emotion_detector import EmotionDetector, create_detector
+from services.onnx_detector import OnnxEmotionDetector, input_layout, parse_input_size
+
+def test_fixed_layouts():
+    assert input_layout([1, 1, 48, 48]) == (True, 1, (48, 48))
+    assert input_layout(["batch", 64, 32, 3]) == (False, 3, (32, 64))
+
+def test_dynamic_spatial_dims_need_a_size():
+    with pytest.raises(ValueError, match="ONNX_INPUT_SIZE"):
+        input_layout(["batch", 3, "height", "width"])
+    with pytest.raises(ValueError, match="ONNX_INPUT_SIZE"):
+        input_layout([None, 3, None, None])
+    assert input_layout(["batch", 3, "height", "width"], (64, 48)) == (True, 3, (64, 48))
+    # A fixed dim is kept even when the other one is dynamic
+    assert input_layout([1, 3, 40, None], (64, 64)) == (True, 3, (64, 40))
+
+def test_unsupported_shapes():
+    with pytest.raises(ValueError):
+        input_layout([1, 48, 48])
+    with pytest.raises(ValueError):
+        input_layout([1, "h", "w", "c"], (48, 48))
+
+def test_parse_input_size():
+    assert parse_input_size(None) is None
+    assert parse_input_size("64x48") == (64, 48)
+    for value in ("64", "ax48", "0x48"):
+        with pytest.raises(ValueError):
+            parse_input_size(value)
+
+def save_model(path, input_shape, reduce_axes, channels):
+    """Tiny model: mean over pixels -> 7 logits"""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper
+
+    weights = helper.make_tensor("w", TensorProto.FLOAT, [channels, 7], np.linspace(-1, 1, channels * 7).tolist())
+    graph = helper.make_graph(
+        [
+            helper.make_node("ReduceMean", ["input"], ["pooled"], axes=reduce_axes, keepdims=0),
+            helper.make_node("MatMul", ["pooled", "w"], ["logits"]),
+        ],
+        "emotion",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, input_shape)],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, [input_shape[0], 7])],
+        [weights],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+@pytest.fixture
+def gray_model(tmp_path):
+    return save_model(tmp_path / "emotion.onnx", ["batch", 1, 48, 48], [2, 3], 1)
+
+def test_grayscale_nchw_model(gray_model):
+    detector = OnnxEmotionDetector(gray_model)
+    assert detector.input_size == (48, 48) and detector.channels_first
+    # Frames of any size are resized to the model input
+    scores = detector.detect_batch(np.full((3, 20, 30, 3), 100, dtype=np.uint8))
+    assert len(scores) == 3
+    assert set(scores[0]) == set(EmotionDetector().emotions)
+    assert sum(scores[0].values()) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        detector.detect_batch(np.zeros((20, 30, 3), dtype=np.uint8))
+
+def test_fixed_batch_nhwc_model_runs_in_chunks(tmp_path):
+    path = save_model(tmp_path / "nhwc.onnx", [1, 32, 32, 3], [1, 2], 3)
+    (tmp_path / "nhwc.labels.txt").write_text("Anger\nDisgusted\nFearful\nHappiness\nSadness\nSurprise\nNeutral\n")
+    detector = OnnxEmotionDetector(path)
+    assert (detector.channels_first, detector.fixed_batch) == (False, 1)
+    assert detector.emotions == ["angry", "disgust", "fear", "happy", "sad", "surprised", "neutral"]
+    frames = np.stack([np.full((32, 32, 3), value, dtype=np.uint8) for value in (0, 128, 255)])
+    scores = detector.detect_batch(frames)
+    assert len(scores) == 3 and scores[0] != scores[2]
+
+def test_backend_selection(gray_model, tmp_path, monkeypatch):
+    monkeypatch.setenv("EMOTION_BACKEND", "mock")
+    assert type(create_detector()) is EmotionDetector
+
+    monkeypatch.setenv("EMOTION_BACKEND", "auto")
+    monkeypatch.setenv("ONNX_MODEL_PATH", gray_model)
+    assert isinstance(create_detector(), OnnxEmotionDetector)
+
+    monkeypatch.setenv("ONNX_MODEL_PATH", str(tmp_path / "missing.onnx"))
+    assert type(create_detector()) is EmotionDetector
+    monkeypatch.setenv("EMOTION_BACKEND", "onnx")
+    with pytest.raises(FileNotFoundError):
+        create_detector()
+
+@pytest.fixture
+def dynamic_model(tmp_path):
+    return save_model(tmp_path / "emotion.onnx", ["batch", 3, "height", "width"], [2, 3], 3)
+
+def test_dynamic_model_uses_configured_size(dynamic_model):
+    detector = OnnxEmotionDetector(dynamic_model, input_size=(32, 24))
+    assert detector.input_size == (32, 24)
+    scores = detector.detect_batch(np.zeros((2, 24, 32, 3), dtype=np.uint8))
+    assert len(scores) == 2 and abs(sum(scores[0].values()) - 1.0) < 1e-6
+
+def test_auto_backend_falls_back_on_dynamic_model(dynamic_model, monkeypatch):
+    monkeypatch.setenv("EMOTION_BACKEND", "auto")
+    monkeypatch.setenv("ONNX_MODEL_PATH", dynamic_model)
+    monkeypatch.delenv("ONNX_INPUT_SIZE", raising=False)
+    assert type(create_detector()) is EmotionDetector
+
+    monkeypatch.setenv("ONNX_INPUT_SIZE", "48x48")
+    assert isinstance(create_detector(), OnnxEmotionDetector)
+
+def test_onnx_backend_reports_dynamic_model(dynamic_model, monkeypatch):
+    monkeypatch.setenv("EMOTION_BACKEND", "onnx")
+    monkeypatch.setenv("ONNX_MODEL_PATH", dynamic_model)
+    monkeypatch.delenv("ONNX_INPUT_SIZE", raising=False)
+    with pytest.raises(ValueError, match="ONNX_INPUT_SIZE"):
+        create_detector()
@@ -0,0 +1,54 @@
+import pytest
+
+from services import session_state
+from services.session_state import SessionState, SessionStore
+
+def scored(happy: float, thumbnail="thumb"):
+    return {"face_detected": True, "emotions": {"happy": happy, "sad": 1.0 - happy}, "thumbnail": thumbnail}
+
+def test_scores_are_smoothed():
+    state = SessionState(alpha=0.5)
+    first = state.update(scored(1.0))
+    second = state.update(scored(0.0))
+    assert first["emotions"]["happy"] == 1.0
+    assert second["emotions"] == pytest.approx({"happy": 0.5, "sad": 0.5})
+    assert second["skipped"] is False
+    assert "thumbnail" not in second
+    assert state.thumbnail == "thumb"
+
+def test_skipped_frames_reuse_the_last_result():
+    state = SessionState(alpha=0.5)
+    state.update(scored(1.0, thumbnail="first"))
+    skipped = state.update({"face_detected": True, "skipped": True})
+    assert skipped["skipped"] is True
+    assert skipped["emotions"]["happy"] == 1.0
+    assert state.thumbnail == "first"
+    assert (state.frames_seen, state.frames_skipped) == (2, 1)
+
+def test_no_face_frames_do_not_move_the_average():
+    state = SessionState(alpha=0.5)
+    state.update(scored(1.0))
+    no_face = state.update({"face_detected": False, "emotions": {}, "thumbnail": "empty"})
+    assert no_face["face_detected"] is False
+    assert state.update(scored(0.0))["emotions"]["happy"] == 0.5
+
+def test_label_change_restarts_the_average():
+    state = SessionState(alpha=0.5)
+    state.update(scored(1.0))
+    result = state.update({"face_detected": True, "emotions": {"neutral": 1.0}})
+    assert result["emotions"] == {"neutral": 1.0}
+
+def test_store_evicts_least_recently_used_and_idle_sessions(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_state.time, "monotonic", lambda: now[0])
+    store = SessionStore(max_sessions=2, idle_ttl=60)
+    a = store.get("a")
+    store.get("b")
+    assert store.get("a") is a
+    store.get("c")  # "b" is least recently used
+    assert store.stats()["active_sessions"] == 2
+    assert store.get("a") is a
+
+    now[0] += 120
+    assert store.get("a") is not a  # idle past the TTL: fresh state
+    assert store.stats()["active_sessions"] == 1
@@ -0,0 +1,46 @@
+import pytest
+
+from services.text_classifier import TextRiskClassifier
+
+TEXTS = [
+    "I feel hopeless and cannot cope anymore",
+    "everything feels hopeless and dark",
+    "I cannot cope and feel hopeless",
+    "hopeless again, I cannot go on",
+    "I am happy and doing great this week",
+    "feeling great and happy with life",
+    "happy, rested and doing great",
+    "great week, really happy",
+]
+LABELS = ["Critical"] * 4 + ["Healthy"] * 4
+
+def test_save_and_load_round_trip(tmp_path):
+    model = TextRiskClassifier.train(TEXTS, LABELS, epochs=100)
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = TextRiskClassifier.load(path)
+    assert loaded.labels == model.labels
+    assert loaded.predict_proba("so hopeless") == model.predict_proba("so hopeless")
+
+def test_predicts_the_closer_class():
+    model = TextRiskClassifier.train(TEXTS, LABELS, epochs=100)
+    scores = model.predict_batch(["I feel so hopeless", "a great and happy day"])
+    assert max(scores[0], key=scores[0].get) == "Critical"
+    assert max(scores[1], key=scores[1].get) == "Healthy"
+    assert sum(scores[0].values()) == pytest.approx(1.0)
+
+def test_cross_validation_scores_held_out_rows():
+    cv = TextRiskClassifier.cross_validate(TEXTS, LABELS, folds=4, epochs=100)
+    assert cv["folds"] == 4
+    assert cv["majority_baseline"] == 0.5
+    assert cv["accuracy"] == 1.0
+
+def test_cross_validation_is_not_train_accuracy():
+    # Labels unrelated to the text: a memorising model scores well on its
+    # training rows but cannot beat chance on held-out ones
+    labels = ["Critical", "Healthy"] * 4
+    model = TextRiskClassifier.train(TEXTS, labels, epochs=300)
+    train_hits = sum(max(scores, key=scores.get) == label for scores, label in zip(model.predict_batch(TEXTS), labels))
+    cv = TextRiskClassifier.cross_validate(TEXTS, labels, folds=4, epochs=300)
+    assert train_hits == len(TEXTS)
+    assert cv["accuracy"] < 1.0
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Train the chat-message risk classifier from mentalHealthTextdata.csv and
+save it to models/text_classifier.npz (loaded by app.py at startup).
+
+Prints stratified cross-validated accuracy before fitting the final model
+on every row, so the number reflects messages the model has not seen.
+
+Usage:
+    python train_text_classifier.py [--csv mentalHealthTextdata.csv] [--out models/text_classifier.npz] [--folds 5]
+"""
+
+import argparse
+import logging
+import os
+
+from services.text_classifier import TextRiskClassifier, read_labelled_csv
+
+logging.basicConfig(level=logging.INFO)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the text risk classifier")
+    parser.add_argument("--csv", default=os.path.join(BASE_DIR, "mentalHealthTextdata.csv"))
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "models", "text_classifier.npz"))
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds (0 to skip)")
+    args = parser.parse_args()
+
+    texts, labels = read_labelled_csv(args.csv)
+    if args.folds > 1:
+        cv = TextRiskClassifier.cross_validate(texts, labels, folds=args.folds, epochs=args.epochs)
+        print(
+            f"📊 {cv['folds']}-fold cross-validated accuracy on {len(texts)} messages: "
+            f"{cv['accuracy']:.0%} (fold std {cv['fold_std']:.0%}, "
+            f"majority-class baseline {cv['majority_baseline']:.0%})"
+        )
+
+    model = TextRiskClassifier.train(texts, labels, epochs=args.epochs)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    model.save(args.out)
+    print(f"✅ Saved text classifier ({', '.join(model.labels)}) to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -84,6 +84,10 @@ source venv/bin/activate
 pip install --upgrade pip
 pip install -r requirements.txt
 
+# Build the text risk classifier served by /classify_text
+print_status "Training text risk classifier..."
+python train_text_classifier.py
+
 # Install system dependencies for OpenCV
 print_status "Installing system dependencies for computer vision..."
 if command -v apt-get &> /dev/null; then